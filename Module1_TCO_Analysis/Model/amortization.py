@@ -0,0 +1,81 @@
+"""
+Closed-form loan amortization helpers.
+
+Every function works on plain floats or NumPy arrays of loans (all arguments
+broadcast against each other), so sweeps can price thousands of loans in one
+call instead of replaying them month by month.
+
+Conventions: amounts are positive magnitudes (a $40,000 loan is
+`principal=40000`, its payment is a positive number), `monthly_rate` is the
+annual rate / 12, and payments are made at the end of each month.
+"""
+
+import numpy as np
+
+
+def payment(principal, monthly_rate, num_payments):
+    """Level monthly payment that repays `principal` in `num_payments` months (PMT)."""
+    principal, monthly_rate, num_payments = np.broadcast_arrays(
+        *(np.asarray(a, dtype=float) for a in (principal, monthly_rate, num_payments))
+    )
+    with np.errstate(divide='ignore', invalid='ignore'):
+        amortized = (principal * monthly_rate) / (1 - (1 + monthly_rate) ** -num_payments)
+    return np.where(monthly_rate == 0, principal / num_payments, amortized)
+
+
+def balance(principal, monthly_payment, monthly_rate, months):
+    """
+    Remaining balance after `months` level payments. Not clamped at zero:
+    once the loan is paid off the result goes negative (the overpayment).
+    """
+    monthly_rate = np.asarray(monthly_rate, dtype=float)
+    growth = (1 + monthly_rate) ** months
+    with np.errstate(divide='ignore', invalid='ignore'):
+        annuity = np.where(monthly_rate == 0, months, (growth - 1) / monthly_rate)
+    return principal * growth - monthly_payment * annuity
+
+
+def future_value(monthly_rate, months, monthly_payment=0.0, present_value=0.0):
+    """Value after `months` of `present_value` invested plus `monthly_payment` added each month (FV)."""
+    monthly_rate = np.asarray(monthly_rate, dtype=float)
+    growth = (1 + monthly_rate) ** months
+    with np.errstate(divide='ignore', invalid='ignore'):
+        annuity = np.where(monthly_rate == 0, months, (growth - 1) / monthly_rate)
+    return present_value * growth + monthly_payment * annuity
+
+
+def payoff_months(principal, monthly_payment, monthly_rate):
+    """
+    Number of payments needed to clear `principal` (NPER), as a float; the
+    final payment is partial when the result is fractional. Returns inf when
+    the payment does not cover the interest, 0 when there is nothing owed.
+    """
+    principal, monthly_payment, monthly_rate = np.broadcast_arrays(
+        *(np.asarray(a, dtype=float) for a in (principal, monthly_payment, monthly_rate))
+    )
+    with np.errstate(divide='ignore', invalid='ignore'):
+        remaining = 1 - principal * monthly_rate / monthly_payment
+        amortized = np.where(remaining > 0, -np.log(remaining) / np.log1p(monthly_rate), np.inf)
+        straight_line = np.where(monthly_payment > 0, principal / monthly_payment, np.inf)
+    months = np.where(monthly_rate == 0, straight_line, amortized)
+    return np.where(principal <= 0, 0.0, months)
+
+
+def payments_to_payoff(principal, monthly_payment, monthly_rate):
+    """Whole number of payments (including a partial last one) needed to clear the loan."""
+    # Tolerance keeps an exact payoff (e.g. 10.0000000001 from rounding) from counting an extra month
+    return np.ceil(payoff_months(principal, monthly_payment, monthly_rate) - 1e-9)
+
+
+def cumulative_principal(principal, monthly_payment, monthly_rate, start, end):
+    """Principal repaid by full payments `start`..`end` (1-based, inclusive)."""
+    return (
+        balance(principal, monthly_payment, monthly_rate, np.asarray(start) - 1)
+        - balance(principal, monthly_payment, monthly_rate, end)
+    )
+
+
+def cumulative_interest(principal, monthly_payment, monthly_rate, start, end):
+    """Interest paid by full payments `start`..`end` (1-based, inclusive) (CUMIPMT)."""
+    num_payments = np.asarray(end) - np.asarray(start) + 1
+    return monthly_payment * num_payments - cumulative_principal(principal, monthly_payment, monthly_rate, start, end)
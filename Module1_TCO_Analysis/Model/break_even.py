@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Break-even solver for the TCO model.
+
+For every `examples` entry, finds the input value at which the scenario costs
+exactly the same as keeping the baseline (total cost difference of zero):
+
+*   Purchases: the asking price (`msrp`) and the APR (`interest_rate`). The
+    depreciation curve is scaled with the price (as `inventory_examples` and
+    `cost_engine.sweep` do), so a cheaper car also resells for less.
+*   Leases: the monthly payment. The lease total does not depend on the price
+    or money factor in this model, so those roots are reported as NaN.
+
+The total cost difference is linear in the lease payment, so that root is
+solved analytically from two evaluations. In price it is piecewise linear
+(property tax changes slope where a year's value crosses the PPTRA cap), so
+the price root takes a few secant steps. It is monotone but not linear in
+APR, so that root is found by bisection. All scenarios are solved together
+on the vectorized engine, which makes it cheap to run across the whole
+prospects inventory.
+
+Usage:
+    python3 Model/break_even.py
+    python3 Model/break_even.py --inventory --template 2024_BMW_iX_Sterling --fees 995
+"""
+
+import argparse
+import copy
+import json
+import sys
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+
+from cost_engine import BaselineSchedule, ScenarioBatch, analysis_months, evaluate
+
+MAX_APR = 0.30
+BISECTION_STEPS = 40  # narrows a 30% bracket to ~3e-13
+PRICE_STEPS = 8       # secant steps; exact once every row is on its final linear piece
+
+
+def _total_diff(schedule, batch, investment_return_rate):
+    return evaluate(schedule, batch, investment_return_rate)['total_diff']
+
+
+def _linear_root(schedule, batch, investment_return_rate, field, at_zero):
+    """Root of the (linear) total cost difference in `field`, from two evaluations."""
+    x0 = getattr(batch, field)
+    step = np.maximum(np.abs(x0) * 0.01, 1.0)
+    f0 = at_zero
+    f1 = _total_diff(schedule, replace(batch, **{field: x0 + step}), investment_return_rate)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = (f1 - f0) / step
+        return np.where(slope != 0, x0 - f0 / slope, np.nan)
+
+
+def _price_root(schedule, batch, investment_return_rate, at_zero):
+    """Root of the total cost difference in `msrp`, with the value curve scaled to each trial price."""
+    def f(price):
+        return _total_diff(schedule, batch.with_msrp(price), investment_return_rate)
+
+    price = batch.msrp.copy()
+    diff = at_zero
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for _ in range(PRICE_STEPS):
+            step = np.maximum(np.abs(price) * 0.01, 1.0)
+            slope = (f(price + step) - diff) / step
+            price = np.where(slope != 0, price - diff / slope, np.nan)
+            diff = f(np.nan_to_num(price))
+            if np.all(np.isnan(price) | (np.abs(diff) < 0.01)):
+                break
+    return price
+
+
+def _apr_root(schedule, batch, investment_return_rate):
+    """Bisection on APR in [0, MAX_APR]; NaN where no APR in the bracket breaks even."""
+    def f(rows, rate):
+        return _total_diff(schedule, replace(rows, interest_rate=rate), investment_return_rate)
+
+    f_low = f(batch, np.zeros(len(batch)))
+    f_high = f(batch, np.full(len(batch), MAX_APR))
+    roots = np.full(len(batch), np.nan)
+    # Only bisect rows with a root in the bracket; the rest would collapse onto 0% APR
+    rows = np.flatnonzero((f_low <= 0) & (f_high >= 0) & ~batch.is_lease)
+    if len(rows) == 0:
+        return roots
+    bracketed = batch.take(rows)
+    low = np.zeros(len(rows))
+    high = np.full(len(rows), MAX_APR)
+    for _ in range(BISECTION_STEPS):
+        mid = (low + high) / 2
+        above = f(bracketed, mid) > 0
+        high = np.where(above, mid, high)
+        low = np.where(above, low, mid)
+    roots[rows] = (low + high) / 2
+    return roots
+
+
+def solve_break_even(comparison_json):
+    """
+    Break-even values for every example:
+
+        {scenario_name: {'total_diff': ..., 'price': ..., 'interest_rate': ..., 'monthly_payment': ...}}
+
+    `total_diff` is the cost difference at the scenario's current inputs; the
+    other entries are the values at which it would be zero (NaN when not
+    applicable to the scenario type or not reachable).
+    """
+    examples = comparison_json['examples']
+    if not examples:
+        return {}
+    assumptions = comparison_json.get('assumptions', {})
+    investment_return_rate = assumptions.get('investment_return_rate', 0.06)
+    months = analysis_months(assumptions)
+    schedule = BaselineSchedule.build(comparison_json['baseline'], months)
+    batch = ScenarioBatch.from_examples(list(examples.values()), months)
+
+    total_diff = _total_diff(schedule, batch, investment_return_rate)
+    price = np.where(batch.is_lease, np.nan, _price_root(schedule, batch, investment_return_rate, total_diff))
+    monthly_payment = np.where(
+        batch.is_lease,
+        _linear_root(schedule, batch, investment_return_rate, 'monthly_payment', total_diff),
+        np.nan,
+    )
+    interest_rate = _apr_root(schedule, batch, investment_return_rate)
+
+    return {
+        name: {
+            'total_diff': float(total_diff[i]),
+            'price': float(price[i]),
+            'interest_rate': float(interest_rate[i]),
+            'monthly_payment': float(monthly_payment[i]),
+        }
+        for i, name in enumerate(examples)
+    }
+
+
+def inventory_examples(template, listings, fees=0.0):
+    """
+    One purchase scenario per listing (active prospect records), cloned from `template`.
+    The asking price (+ `fees`) becomes the msrp and the template's depreciation
+    curve is scaled to that price.
+    """
+    examples = {}
+    for car in listings:
+        price = car['price'] + fees
+        example = copy.deepcopy(template)
+        scale = price / template['msrp']
+        example['msrp'] = price
+        example['values_3yr'] = [value * scale for value in template['values_3yr']]
+        example['name'] = f"{car.get('year_make_model', '')} {car.get('trim', '')} ({car.get('dealer', '')})".strip()
+        examples[car['vin']] = example
+    return examples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Break-even asking price / APR for each scenario.")
+    parser.add_argument("--scenarios", type=str, default=None, help="Path to scenarios.json")
+    parser.add_argument("--inventory", action="store_true", help="Solve every active listing in the Module 2 prospects store")
+    parser.add_argument("--template", type=str, default=None, help="Example used as the template for inventory listings (default: first example)")
+    parser.add_argument("--fees", type=float, default=0.0, help="Dealer fees added to each listing's asking price")
+    args = parser.parse_args()
+
+    project_root = Path(__file__).parent.parent
+    scenarios_path = Path(args.scenarios) if args.scenarios else project_root / 'scenarios' / 'scenarios.json'
+    with open(scenarios_path, 'r') as f:
+        comparison_json = json.load(f)
+
+    if args.inventory:
+        # Read through the store (event log or SQLite) rather than the
+        # prospects_db.json view, which is only an export of it
+        module2 = project_root.parent / 'Module2_Prospecting'
+        sys.path.insert(0, str(module2 / 'scrapers'))
+        from prospects_store import open_store
+        store = open_store(module2 / 'data')
+        listings = store.active_vehicles()
+        store.close()
+        template_name = args.template or next(iter(comparison_json['examples']))
+        template = comparison_json['examples'][template_name]
+        comparison_json = dict(comparison_json, examples=inventory_examples(template, listings, args.fees))
+        print(f"Solving {len(comparison_json['examples'])} active listings against template '{template_name}'...")
+
+    results = solve_break_even(comparison_json)
+    print(f"{'Scenario':<40} {'Total Diff':>11} {'B/E Price':>11} {'B/E APR':>8} {'B/E Payment':>12}")
+    for name, r in sorted(results.items(), key=lambda item: item[1]['total_diff']):
+        apr = f"{r['interest_rate']:.2%}" if not np.isnan(r['interest_rate']) else 'n/a'
+        price = f"{r['price']:,.0f}" if not np.isnan(r['price']) else 'n/a'
+        monthly = f"{r['monthly_payment']:,.0f}" if not np.isnan(r['monthly_payment']) else 'n/a'
+        print(f"{name:<40} {r['total_diff']:>11,.0f} {price:>11} {apr:>8} {monthly:>12}")
+
+
+if __name__ == "__main__":
+    main()
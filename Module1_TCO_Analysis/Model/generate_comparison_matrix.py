@@ -7,22 +7,31 @@ import json
 import pandas as pd
 from pathlib import Path
 from car_keep_runner import run_comparison_from_json
+from cost_engine import format_amount
 
 
-def generate_comparison_matrix(data_folder=None):
-    """Generate a consolidated cost difference CSV file."""
+def generate_comparison_matrix(data_folder=None, scenarios_data=None, all_results=None):
+    """
+    Generate a consolidated cost difference CSV file.
+
+    `scenarios_data` / `all_results` let a caller that has already loaded and
+    evaluated scenarios.json (see run_analysis.py) reuse them instead of
+    re-reading and re-running everything here.
+    """
     if data_folder is None:
         data_folder = Path(__file__).parent.parent
     
-    print("Running all scenarios to generate comparison matrix...")
-    
-    # Load scenarios from JSON
-    scenarios_file = data_folder / 'scenarios' / 'scenarios.json'
-    with open(scenarios_file, 'r') as f:
-        scenarios_data = json.load(f)
-    
-    # Run all scenarios
-    all_results = run_comparison_from_json(scenarios_data)
+    if all_results is None:
+        print("Running all scenarios to generate comparison matrix...")
+        
+        # Load scenarios from JSON
+        if scenarios_data is None:
+            scenarios_file = data_folder / 'scenarios' / 'scenarios.json'
+            with open(scenarios_file, 'r') as f:
+                scenarios_data = json.load(f)
+        
+        # Run all scenarios
+        all_results = run_comparison_from_json(scenarios_data)
     
     print("\nGenerating consolidated CSV files...")
     
@@ -44,21 +53,20 @@ def create_cost_difference_matrix(all_results):
     
     # Get the first result to determine structure
     first_result = list(all_results.values())[0]
-    cost_diff_data = first_result['results']['cost_difference']
     
     # Create base matrix with cost components
-    cost_components = [row[0] for row in cost_diff_data['data']]
+    cost_components = [label for label, _, _ in first_result.rows()]
     
     matrix_data = {
         'Cost Component': cost_components
     }
     
-    # Add each scenario as columns with descriptions
-    for scenario_name, results in all_results.items():
-        cost_diff_data = results['results']['cost_difference']
+    # Add each scenario as columns with descriptions (amounts are formatted here, at the report edge)
+    for scenario_name, result in all_results.items():
+        rows = result.rows()
         
-        amounts = [row[1] for row in cost_diff_data['data']]
-        descriptions = [row[2] for row in cost_diff_data['data']]
+        amounts = [format_amount(amount) for _, amount, _ in rows]
+        descriptions = [description for _, _, description in rows]
         
         matrix_data[f"{scenario_name}_amount"] = amounts
         matrix_data[f"{scenario_name}_description"] = descriptions
@@ -3,10 +3,13 @@ import xlsxwriter
 from pathlib import Path
 from car_keep_runner import run_comparison_from_json
 
-def generate_excel_report():
+def generate_excel_report(scenarios=None, results=None):
     """
     Generate an Excel report by running the core calculation engine and
     writing the inputs and results to separate sheets.
+
+    Pass already loaded `scenarios` and evaluated `results` to skip reloading
+    scenarios.json and re-running the engine.
     """
     # Resolve project root relative to this script's location
     project_root = Path(__file__).parent.parent
@@ -16,21 +19,24 @@ def generate_excel_report():
     output_path = output_dir / 'car_ownership_analysis.xlsx'
 
     # Load data from scenarios.json
-    with open(scenarios_path, 'r') as f:
-        scenarios = json.load(f)
+    if scenarios is None:
+        with open(scenarios_path, 'r') as f:
+            scenarios = json.load(f)
 
     # Run the core calculation engine to get definitive results
-    results = run_comparison_from_json(scenarios)
+    if results is None:
+        results = run_comparison_from_json(scenarios)
     
     # We only have one scenario, so get the first one
     scenario_name = list(results.keys())[0]
-    cost_difference_data = results[scenario_name]['results']['cost_difference']
+    cost_difference = results[scenario_name]
 
     # Create a new Excel workbook
     workbook = xlsxwriter.Workbook(str(output_path))
     
     # Add formats
     header_format = workbook.add_format({'bold': True, 'bg_color': '#F0F0F0', 'border': 1})
+    currency_format = workbook.add_format({'num_format': '$#,##0'})
     
     # Add worksheets
     inputs_sheet = workbook.add_worksheet('Inputs')
@@ -38,7 +44,7 @@ def generate_excel_report():
 
     # Write data and formulas to the worksheets
     write_inputs_sheet(inputs_sheet, scenarios, header_format)
-    write_cost_diff_sheet(cost_diff_sheet, cost_difference_data, header_format)
+    write_cost_diff_sheet(cost_diff_sheet, cost_difference, header_format, currency_format)
 
     # Close the workbook
     workbook.close()
@@ -76,21 +82,21 @@ def write_inputs_sheet(sheet, scenarios, header_format):
         sheet.write(row, 1, str(value))
         row += 1
 
-def write_cost_diff_sheet(sheet, cost_difference_data, header_format):
+def write_cost_diff_sheet(sheet, cost_difference, header_format, currency_format):
     """Write the calculated cost difference breakdown to its worksheet."""
     sheet.set_column('A:A', 25)
     sheet.set_column('B:B', 15)
     sheet.set_column('C:C', 60)
 
     # Write headers
-    headers = cost_difference_data.get('columns', [])
-    for col, header in enumerate(headers):
+    for col, header in enumerate(['Cost Component', 'Amount', 'Description']):
         sheet.write(0, col, header, header_format)
         
-    # Write data rows
-    for row_idx, row_data in enumerate(cost_difference_data.get('data', []), 1):
-        for col_idx, cell_data in enumerate(row_data):
-            sheet.write(row_idx, col_idx, cell_data)
+    # Write data rows (full-precision numeric cells, shown in whole dollars, so sums match the model)
+    for row_idx, (label, amount, description) in enumerate(cost_difference.rows(), 1):
+        sheet.write(row_idx, 0, label)
+        sheet.write_number(row_idx, 1, amount, currency_format)
+        sheet.write(row_idx, 2, description)
 
 if __name__ == '__main__':
     generate_excel_report()
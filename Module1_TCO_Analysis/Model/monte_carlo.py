@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo risk mode for the TCO model.
+
+`calculate_vehicle_costs` treats depreciation (`values_3yr`), `fuel_monthly`
+and `investment_return_rate` as point estimates. This module draws N paths for
+those inputs from the distributions declared in scenarios.json and reports
+percentile bands of the total cost difference per scenario.
+
+Distributions live in a `monte_carlo` block under `assumptions`; the baseline
+and each example may carry their own `monte_carlo` block to override the
+`values_3yr` / `fuel_monthly` specs for that vehicle:
+
+    "assumptions": {
+      "investment_return_rate": 0.07,
+      "monte_carlo": {
+        "paths": 10000,
+        "seed": 2026,
+        "investment_return_rate": {"dist": "normal", "std": 0.04},
+        "values_3yr": {"dist": "lognormal", "sigma": 0.12},
+        "fuel_monthly": {"dist": "normal", "std": 0.2}
+      }
+    }
+
+`investment_return_rate` is drawn directly (centred on the point estimate).
+`values_3yr` and `fuel_monthly` are drawn as multipliers centred on 1.0: the
+depreciation multiplier scales the values after year 0 (the price is known),
+the fuel multiplier scales the monthly fuel cost. Supported distributions are
+normal (mean, std), lognormal (median, sigma), uniform (low, high) and
+triangular (low, mode, high); omitted centres default to the point estimate.
+
+Baseline and investment return draws are shared by every scenario on a path
+(common random numbers), so scenario-to-scenario comparisons stay tight.
+
+Usage:
+    python3 Model/monte_carlo.py
+    python3 Model/monte_carlo.py --paths 100000 --workers 4 --seed 7
+"""
+
+import argparse
+import json
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+
+from cost_engine import BaselineSchedule, ScenarioBatch, analysis_months, evaluate, project_values
+
+PERCENTILES = (5, 50, 95)
+DEFAULT_PATHS = 10000
+BLOCK_SIZE = 25000  # paths per block; also the unit of work handed to the process pool
+
+
+def draw(rng, spec, size, center):
+    """Draw `size` samples from a distribution spec, centred on `center` when not given."""
+    if not spec:
+        return np.full(size, center, dtype=float)
+    dist = spec.get('dist', 'normal')
+    if dist == 'normal':
+        return rng.normal(spec.get('mean', center), spec['std'], size)
+    if dist == 'lognormal':
+        return spec.get('median', center) * rng.lognormal(0.0, spec['sigma'], size)
+    if dist == 'uniform':
+        return rng.uniform(spec['low'], spec['high'], size)
+    if dist == 'triangular':
+        return rng.triangular(spec['low'], spec.get('mode', center), spec['high'], size)
+    raise ValueError(f"Unknown distribution '{dist}' (expected normal, lognormal, uniform or triangular)")
+
+
+def _vehicle_specs(vehicle, defaults):
+    overrides = vehicle.get('monte_carlo', {})
+    return {key: overrides.get(key, defaults.get(key)) for key in ('values_3yr', 'fuel_monthly')}
+
+
+def _draw_vehicle(rng, vehicle, specs, n):
+    """Per-path values_3yr (n, len) and fuel_monthly (n,) for one vehicle."""
+    values = np.asarray(vehicle['values_3yr'], dtype=float)
+    depreciation = draw(rng, specs['values_3yr'], n, 1.0)
+    drawn_values = np.repeat(values[None, :], n, axis=0)
+    drawn_values[:, 1:] *= depreciation[:, None]
+    fuel = vehicle['fuel_monthly'] * draw(rng, specs['fuel_monthly'], n, 1.0)
+    return drawn_values, fuel
+
+
+def _simulate_block(comparison_json, seed_seq, n):
+    """Total cost difference for every scenario on `n` paths -> (scenarios, n)."""
+    rng = np.random.default_rng(seed_seq)
+    assumptions = comparison_json.get('assumptions', {})
+    mc = assumptions.get('monte_carlo', {})
+    baseline = comparison_json['baseline']
+    months = analysis_months(assumptions)
+    schedule = BaselineSchedule.build(baseline, months)
+
+    rate = draw(rng, mc.get('investment_return_rate'), n, assumptions.get('investment_return_rate', 0.06))
+    rdx_values, rdx_fuel = _draw_vehicle(rng, baseline, _vehicle_specs(baseline, mc), n)
+
+    totals = []
+    for scenario in comparison_json['examples'].values():
+        values, fuel = _draw_vehicle(rng, scenario, _vehicle_specs(scenario, mc), n)
+        yearly_values, value_end = project_values(values, months)
+        batch = replace(
+            ScenarioBatch.from_examples([scenario], months).take(np.zeros(n, dtype=int)),
+            values=yearly_values,
+            value_end=value_end,
+            fuel_monthly=fuel,
+        )
+        components = evaluate(schedule, batch, rate, baseline_values=rdx_values, baseline_fuel_monthly=rdx_fuel)
+        totals.append(components['total_diff'])
+    return np.vstack(totals)
+
+
+def run_monte_carlo(comparison_json, paths=None, seed=None, workers=None):
+    """
+    Simulate every example in `comparison_json` and return percentile bands of
+    the total cost difference:
+
+        {scenario_name: {'p5': ..., 'p50': ..., 'p95': ..., 'mean': ..., 'prob_cheaper': ...}}
+
+    `paths` and `seed` default to the `monte_carlo` block in assumptions. Paths are
+    simulated in fixed blocks with independent child seeds, so results are the
+    same whether they run in-process (`workers` None/1) or across a process pool.
+    """
+    mc = comparison_json.get('assumptions', {}).get('monte_carlo', {})
+    paths = int(paths or mc.get('paths', DEFAULT_PATHS))
+    seed = seed if seed is not None else mc.get('seed')
+
+    block_sizes = [min(BLOCK_SIZE, paths - start) for start in range(0, paths, BLOCK_SIZE)]
+    seeds = np.random.SeedSequence(seed).spawn(len(block_sizes))
+
+    if workers and workers > 1 and len(block_sizes) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            blocks = list(pool.map(_simulate_block, [comparison_json] * len(seeds), seeds, block_sizes))
+    else:
+        blocks = [_simulate_block(comparison_json, s, n) for s, n in zip(seeds, block_sizes)]
+    totals = np.hstack(blocks)
+
+    bands = np.percentile(totals, PERCENTILES, axis=1)
+    results = {}
+    for i, scenario_name in enumerate(comparison_json['examples']):
+        results[scenario_name] = {f'p{p}': bands[j, i] for j, p in enumerate(PERCENTILES)}
+        results[scenario_name]['mean'] = totals[i].mean()
+        results[scenario_name]['prob_cheaper'] = (totals[i] < 0).mean()  # share of paths where the new car wins
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo percentile bands of the total cost difference.")
+    parser.add_argument("--paths", type=int, default=None, help="Number of paths (default: assumptions.monte_carlo.paths)")
+    parser.add_argument("--seed", type=int, default=None, help="RNG seed (default: assumptions.monte_carlo.seed)")
+    parser.add_argument("--workers", type=int, default=None, help="Split path blocks across this many processes")
+    parser.add_argument("--scenarios", type=str, default=None, help="Path to scenarios.json")
+    args = parser.parse_args()
+
+    scenarios_path = Path(args.scenarios) if args.scenarios else Path(__file__).parent.parent / 'scenarios' / 'scenarios.json'
+    with open(scenarios_path, 'r') as f:
+        comparison_json = json.load(f)
+
+    results = run_monte_carlo(comparison_json, paths=args.paths, seed=args.seed, workers=args.workers)
+    print(f"{'Scenario':<40} {'P5':>10} {'P50':>10} {'P95':>10} {'P(cheaper)':>11}")
+    for scenario_name, bands in results.items():
+        print(f"{scenario_name:<40} {bands['p5']:>10,.0f} {bands['p50']:>10,.0f} {bands['p95']:>10,.0f} {bands['prob_cheaper']:>11.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+On-disk cache of TCO results keyed by the content of each scenario.
+
+A daily rerun of run_analysis.py usually changes one or two entries in
+scenarios.json. Each example is keyed by a stable hash of its canonicalized
+dict together with the baseline and assumptions, so only changed scenarios
+go through the engine; the rest are served from the cache.
+
+The cache is a single JSON file kept in least-recently-used order and
+bounded to `max_entries` results.
+"""
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from dataclasses import asdict
+from datetime import datetime
+
+from car_keep_runner import run_comparison_from_json
+from cost_engine import CostDifference
+
+# Bump when the financial logic changes so stale results are not reused
+CACHE_VERSION = 4
+DEFAULT_MAX_ENTRIES = 512
+
+
+def scenario_key(scenario, baseline, assumptions):
+    """Stable content hash of one example plus everything it is evaluated against."""
+    canonical = json.dumps(
+        {'version': CACHE_VERSION, 'scenario': scenario, 'baseline': baseline, 'assumptions': assumptions},
+        sort_keys=True,
+        separators=(',', ':'),
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """Size-bounded LRU cache of CostDifference results persisted as JSON."""
+
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.evicted = 0
+        if path.exists():
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+                if data.get('version') == CACHE_VERSION:
+                    self.entries = OrderedDict(data.get('entries', {}))
+            except json.JSONDecodeError:
+                print(f"Warning: result cache {path} is corrupt. Starting with an empty cache.")
+
+    def get(self, key):
+        if key not in self.entries:
+            return None
+        self.entries.move_to_end(key)
+        return CostDifference(**self.entries[key])
+
+    def put(self, key, result):
+        self.entries[key] = asdict(result)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evicted += 1
+
+    def save(self):
+        """Write the cache atomically (temp file + rename)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': CACHE_VERSION, 'entries': self.entries}, f)
+        os.replace(tmp_path, self.path)
+
+
+def run_comparison_cached(comparison_json, cache):
+    """
+    `run_comparison_from_json` that only evaluates examples missing from `cache`.
+    Returns (results, status) where status maps each scenario to 'hit' or 'miss'.
+    """
+    baseline = comparison_json['baseline']
+    assumptions = comparison_json.get('assumptions', {})
+    keys = {name: scenario_key(scenario, baseline, assumptions) for name, scenario in comparison_json['examples'].items()}
+
+    cached = {name: cache.get(key) for name, key in keys.items()}
+    missing = {name: comparison_json['examples'][name] for name, result in cached.items() if result is None}
+    fresh = run_comparison_from_json(dict(comparison_json, examples=missing)) if missing else {}
+    for name, result in fresh.items():
+        cache.put(keys[name], result)
+
+    results = {name: cached[name] if cached[name] is not None else fresh[name] for name in keys}
+    status = {name: 'miss' if name in missing else 'hit' for name in keys}
+    return results, status
+
+
+def record_run(log_path, cache, status):
+    """Append this run's hit/miss counts to the cache log (one JSON object per line)."""
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    entry = {
+        'timestamp': datetime.now().isoformat(),
+        'hits': sum(1 for s in status.values() if s == 'hit'),
+        'misses': sum(1 for s in status.values() if s == 'miss'),
+        'evicted': cache.evicted,
+        'cache_size': len(cache.entries),
+        'scenarios': status,
+    }
+    with open(log_path, 'a') as f:
+        f.write(json.dumps(entry) + '\n')
+    return entry
@@ -0,0 +1,215 @@
+import copy
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import cost_engine
+
+SCENARIOS = Path(__file__).resolve().parent.parent / 'scenarios' / 'scenarios.json'
+ARCHIVED_SCENARIOS = SCENARIOS.with_name('archived_scenarios.json')  # has the lease examples
+
+
+def reference_costs(rdx_data, scenario_data, assumptions):
+    """
+    The original month-by-month model (36 months), kept as the reference the
+    vectorized engine is checked against. Returns the cost difference
+    components as numbers instead of formatted strings.
+    """
+    rdx_principal_balance = rdx_data['loan_principal_balance']
+    rdx_total_payment = rdx_data['monthly_payment'] + rdx_data['extra_payment']
+    rdx_interest_rate = rdx_data['interest_rate']
+    rdx_values_3yr = rdx_data['values_3yr']
+    rdx_insurance_monthly = rdx_data['insurance_monthly']
+    rdx_maintenance_annual = rdx_data['maintenance_annual']
+    rdx_fuel_monthly = rdx_data['fuel_monthly']
+
+    vehicle2_msrp = scenario_data['msrp']
+    vehicle2_values_3yr = scenario_data['values_3yr']
+    vehicle2_insurance_monthly = scenario_data['insurance_monthly']
+    vehicle2_maintenance_annual = scenario_data['maintenance_annual']
+    vehicle2_fuel_monthly = scenario_data['fuel_monthly']
+
+    property_tax_rate = scenario_data['property_tax_rate']
+    pptra_relief = scenario_data['pptra_relief']
+
+    investment_return_rate = assumptions.get('investment_return_rate', 0.06)
+    monthly_investment_rate = investment_return_rate / 12
+
+    def calculate_property_tax(vehicle_value):
+        pptra_amount = min(vehicle_value, 20000) * property_tax_rate * pptra_relief
+        tax_first_20k = min(vehicle_value, 20000) * property_tax_rate
+        tax_over_20k = max(vehicle_value - 20000, 0) * property_tax_rate
+        return (tax_first_20k + tax_over_20k - pptra_amount) / 12
+
+    rdx_monthly_costs = []
+    v2_monthly_costs = []
+    rdx_loan_balance = rdx_principal_balance
+
+    is_lease = scenario_data.get('type') == 'lease'
+    if not is_lease:
+        loan_amount = vehicle2_msrp - scenario_data['down_payment']
+        monthly_rate = scenario_data['interest_rate'] / 12
+        num_payments = scenario_data['loan_term']
+        vehicle2_monthly_payment_base = (loan_amount * monthly_rate) / (1 - (1 + monthly_rate)**-num_payments)
+    else:
+        vehicle2_monthly_payment_base = scenario_data['monthly_payment']
+        lease_term = scenario_data.get('lease_term_months', 36)
+        lease_total_contract_cost = scenario_data['down_payment'] + (vehicle2_monthly_payment_base * lease_term)
+        lease_extension_monthly_cost = lease_total_contract_cost / lease_term
+
+    for month in range(1, 37):
+        year_idx = (month - 1) // 12
+
+        rdx_loan_payment_monthly = 0
+        if rdx_loan_balance > 0:
+            monthly_interest = rdx_loan_balance * (rdx_interest_rate / 12)
+            principal_paid = rdx_total_payment - monthly_interest
+            rdx_loan_balance -= principal_paid
+            rdx_loan_payment_monthly = rdx_total_payment
+            if rdx_loan_balance < 0:
+                rdx_loan_payment_monthly += rdx_loan_balance
+                rdx_loan_balance = 0
+
+        rdx_tax = calculate_property_tax(rdx_values_3yr[year_idx])
+        rdx_maint = rdx_maintenance_annual[year_idx] / 12
+        rdx_monthly_costs.append(rdx_loan_payment_monthly + rdx_tax + rdx_insurance_monthly + rdx_maint + rdx_fuel_monthly)
+
+        v2_tax = calculate_property_tax(vehicle2_values_3yr[year_idx])
+        v2_maint = vehicle2_maintenance_annual[year_idx] / 12
+        current_v2_payment = vehicle2_monthly_payment_base
+        if is_lease and month > lease_term:
+            current_v2_payment = lease_extension_monthly_cost
+        v2_monthly_costs.append(current_v2_payment + v2_tax + vehicle2_insurance_monthly + v2_maint + vehicle2_fuel_monthly)
+
+    opportunity_cost = 0
+    for month in range(36):
+        monthly_difference = v2_monthly_costs[month] - rdx_monthly_costs[month]
+        opportunity_cost += monthly_difference * ((1 + monthly_investment_rate) ** (36 - (month + 1)))
+
+    v2_upfront_cash = scenario_data.get('down_payment', 0)
+    if is_lease:
+        v2_upfront_cash += scenario_data.get('refundable_msd', 0)
+    opportunity_cost += v2_upfront_cash * ((1 + monthly_investment_rate) ** 36) - v2_upfront_cash
+
+    rdx_total_cost_3yr = sum(rdx_monthly_costs)
+    v2_total_cost_3yr = sum(v2_monthly_costs)
+    rdx_equity_end = rdx_values_3yr[-1]
+
+    def calculate_total_interest(principal, monthly_payment, interest_rate, months):
+        balance = principal
+        total_interest = 0
+        for _ in range(months):
+            interest = balance * (interest_rate / 12)
+            balance -= monthly_payment - interest
+            total_interest += interest
+        return total_interest
+
+    rdx_months_to_payoff = next((i for i, cost in enumerate(rdx_monthly_costs) if cost < rdx_total_payment), 36)
+    rdx_total_interest = calculate_total_interest(rdx_principal_balance, rdx_total_payment, rdx_interest_rate, rdx_months_to_payoff)
+
+    if is_lease:
+        refundable_msd = scenario_data.get('refundable_msd', 0)
+        vehicle2_equity_end = refundable_msd - scenario_data.get('disposition_fee', 0)
+        mf = scenario_data.get('money_factor', 0.002)
+        avg_value = (vehicle2_msrp + scenario_data.get('residual_value', vehicle2_msrp*0.53)) / 2
+        vehicle2_interest = avg_value * mf * 36
+        v2_total_payments_3yr = (vehicle2_monthly_payment_base * lease_term) + (lease_extension_monthly_cost * (36 - lease_term))
+        effective_down_payment_cash_flow = scenario_data.get("down_payment", 0) + refundable_msd
+    else:
+        vehicle2_equity_end = vehicle2_values_3yr[-1]
+        vehicle2_interest = calculate_total_interest(loan_amount, vehicle2_monthly_payment_base, scenario_data['interest_rate'], 36)
+        v2_total_payments_3yr = vehicle2_monthly_payment_base * 36
+        effective_down_payment_cash_flow = scenario_data.get("down_payment", 0)
+
+    total_diff = (v2_total_cost_3yr + effective_down_payment_cash_flow - vehicle2_equity_end) - (rdx_total_cost_3yr - rdx_equity_end)
+    return {
+        'payment_diff': v2_total_payments_3yr - (rdx_total_payment * rdx_months_to_payoff),
+        'interest_diff': vehicle2_interest - rdx_total_interest,
+        'down_payment': effective_down_payment_cash_flow,
+        'property_tax_diff': sum(calculate_property_tax(v) for v in vehicle2_values_3yr[:3]) * 12 - sum(calculate_property_tax(v) for v in rdx_values_3yr[:3]) * 12,
+        'insurance_diff': (vehicle2_insurance_monthly - rdx_insurance_monthly) * 36,
+        'maintenance_diff': sum(vehicle2_maintenance_annual) - sum(rdx_maintenance_annual),
+        'fuel_diff': (vehicle2_fuel_monthly - rdx_fuel_monthly) * 36,
+        'equity_diff': rdx_equity_end - vehicle2_equity_end,
+        'opportunity_cost': opportunity_cost,
+        'total_diff': total_diff + opportunity_cost,
+    }
+
+
+def fuzzed_comparison(seed, size=40):
+    """scenarios.json with its baseline and examples perturbed at random (loans of 36+ months)."""
+    rng = np.random.default_rng(seed)
+    with open(SCENARIOS, 'r') as f:
+        data = json.load(f)
+    baseline = data['baseline']
+    # Loan balances from nearly paid off to outlasting the horizon
+    baseline['loan_principal_balance'] = float(rng.uniform(0, 30000))
+    baseline['extra_payment'] = float(rng.uniform(0, 500))
+    baseline['interest_rate'] = float(rng.uniform(0.0, 0.09))
+    baseline['values_3yr'] = sorted(rng.uniform(10000, 30000, 4).round(0).tolist(), reverse=True)
+
+    with open(ARCHIVED_SCENARIOS, 'r') as f:
+        archived = json.load(f)['examples']
+    templates = list(data['examples'].values()) + list(archived.values())
+    examples = {}
+    for i in range(size):
+        example = copy.deepcopy(templates[i % len(templates)])
+        example['msrp'] = float(rng.uniform(30000, 80000))
+        example['values_3yr'] = sorted((example['msrp'] * rng.uniform(0.3, 1.0, 4)).round(0).tolist(), reverse=True)
+        example['down_payment'] = float(rng.uniform(0, 15000))
+        example['fuel_monthly'] = float(rng.uniform(50, 300))
+        if example.get('type') == 'lease':
+            example['monthly_payment'] = float(rng.uniform(300, 1200))
+            example['lease_term_months'] = int(rng.integers(24, 37))
+        else:
+            example['interest_rate'] = float(rng.uniform(0.01, 0.09))
+            example['loan_term'] = int(rng.integers(36, 85))
+        examples[f"example_{i}"] = example
+    data['examples'] = examples
+    data.setdefault('assumptions', {})['investment_return_rate'] = float(rng.uniform(0.0, 0.1))
+    return data
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_engine_matches_reference_model(seed):
+    data = fuzzed_comparison(seed)
+    results = cost_engine.run_comparison(data)
+    for name, scenario in data['examples'].items():
+        expected = reference_costs(data['baseline'], scenario, data['assumptions'])
+        actual = results[name]
+        for key, amount in expected.items():
+            assert getattr(actual, key) == pytest.approx(amount, abs=0.005), (name, key)
+
+
+def test_shipped_scenarios_match_reference_model():
+    with open(SCENARIOS, 'r') as f:
+        data = json.load(f)
+    results = cost_engine.run_comparison(data)
+    for name, scenario in data['examples'].items():
+        expected = reference_costs(data['baseline'], scenario, data.get('assumptions', {}))
+        for key, amount in expected.items():
+            assert getattr(results[name], key) == pytest.approx(amount, abs=0.005), (name, key)
+
+
+def test_short_loan_stops_payments_at_term():
+    # Unlike the reference model, which kept charging the payment for all 36
+    # months, a loan shorter than the horizon is paid off at the end of its term
+    with open(SCENARIOS, 'r') as f:
+        data = json.load(f)
+    scenario = next(s for s in data['examples'].values() if s.get('type') != 'lease')
+    loan_amount = scenario['msrp'] - scenario['down_payment']
+    monthly_rate = scenario['interest_rate'] / 12
+
+    def evaluate(term):
+        batch = cost_engine.ScenarioBatch.from_examples([dict(scenario, loan_term=term)])
+        return cost_engine.evaluate(data['baseline'], batch, 0.06)
+
+    short, full = evaluate(24), evaluate(36)
+    short_payment = float(cost_engine.amortization.payment(loan_amount, monthly_rate, 24))
+    full_payment = float(cost_engine.amortization.payment(loan_amount, monthly_rate, 36))
+    # Same costs otherwise: the months differ only by the payment
+    assert np.allclose(short['v2_monthly'][0, :24] - full['v2_monthly'][0, :24], short_payment - full_payment)
+    assert np.allclose(full['v2_monthly'][0, 24:] - short['v2_monthly'][0, 24:], full_payment)
+    assert short['payment_diff'][0] - full['payment_diff'][0] == pytest.approx(short_payment * 24 - full_payment * 36)
@@ -1,5 +1,3 @@
-import numpy as np
-
 # Inputs from LeaseHackr / User Deal
 POLESTAR_MSRP = 76600
 POLESTAR_MONTHLY = 312
@@ -34,34 +32,20 @@ print("--- Independent Verification ---")
 polestar_flows = [-9030] + [-312]*27 + [-516.81]*9
 polestar_flows[36] += 3500 # MSD Return at end
 
-# Helper functions for financial calcs (since numpy.pmt is deprecated)
-def pmt(rate, nper, pv):
-    return (pv * rate) / (1 - (1 + rate)**-nper)
-
-def fv(rate, nper, pmt, pv):
-    return (pmt/rate) * ((1+rate)**nper - 1) + pv*(1+rate)**nper
-
-def nper(rate, pmt, pv):
-    import math
-    # Formula: n = -log(1 - (pv*r)/pmt) / log(1+r)
-    # Caution: pmt sign convention. Here pmt is negative (payment).
-    # If pv is positive loan, pmt should be negative.
-    num = 1 - (pv * rate / -pmt) 
-    if num <= 0: return 999
-    return -math.log(num) / math.log(1 + rate)
+# Financial helpers (PMT / FV / NPER) live in amortization.py; amounts are positive magnitudes there
+from amortization import balance, payment, payments_to_payoff
 
 # 2. BMW iX Analysis (36 Months)
 # Cash Flows:
 # T=0: -10000
 # Loan Payment Calculation:
 loan_amt = BMW_PRICE - BMW_DOWN
-bmw_monthly = pmt(BMW_RATE/12, BMW_TERM, -loan_amt) # Returns negative P
-bmw_monthly = -bmw_monthly # Convert to positive magnitude
+bmw_monthly = float(payment(loan_amt, BMW_RATE/12, BMW_TERM))
 bmw_flows = [-10000] + [-bmw_monthly]*36
 # T=36: +Equity. 
 # Depreciation 3 Years (~52% residual on purchase? User guide says values: [46995, 32896, 26317, 22370])
 # Loan Balance at 36 months:
-bmw_balance_36 = fv(BMW_RATE/12, 36, -bmw_monthly, loan_amt) # Loan positive, pmt negative
+bmw_balance_36 = float(balance(loan_amt, bmw_monthly, BMW_RATE/12, 36))
 bmw_equity_36 = 22370 - bmw_balance_36
 bmw_flows[36] += bmw_equity_36
 
@@ -71,8 +55,7 @@ bmw_flows[36] += bmw_equity_36
 # Payments:
 # RDX Loan is $8000 at start. Payment $600/mo.
 # Months to payoff = nper(rate, pmt, pv)
-rdx_payoff_months = nper(RDX_RATE/12, -(RDX_PAYMENT), RDX_LOAN)
-rdx_payoff_months = int(np.ceil(rdx_payoff_months))
+rdx_payoff_months = int(payments_to_payoff(RDX_LOAN, RDX_PAYMENT, RDX_RATE/12))
 print(f"RDX Payoff Months: {rdx_payoff_months}")
 
 rdx_flows = [0]
@@ -5,9 +5,20 @@ Main entry point to run the full car ownership cost analysis.
 This script orchestrates the execution of the different reporting
 and analysis modules, providing a single command to generate all
 project outputs.
+
+scenarios.json is loaded and evaluated exactly once; the in-memory
+results are then handed to the CSV and Excel writers, which can
+optionally run concurrently (--parallel).
+
+Results are cached per scenario in outputs/.cache, so only examples
+that changed since the last run are recomputed (disable with --no-cache).
+Hits and misses for each run are appended to outputs/cache_log.jsonl.
 """
 
+import argparse
+import json
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Add the Model directory to the system path to allow for module imports
@@ -16,38 +27,85 @@ model_path = project_root / 'Model'
 sys.path.append(str(model_path))
 
 try:
+    from car_keep_runner import run_comparison_from_json
     from generate_comparison_matrix import generate_comparison_matrix
     from generate_excel_report import generate_excel_report
+    from result_cache import ResultCache, record_run, run_comparison_cached
 except ImportError as e:
     print(f"Error: Could not import necessary modules from the 'Model' directory.")
     print(f"Please ensure the 'Model' directory and its contents are intact.")
     print(f"Import error: {e}")
     sys.exit(1)
 
-def run_full_analysis():
+output_dir = project_root / 'outputs'
+cache_path = output_dir / '.cache' / 'results_cache.json'
+cache_log_path = output_dir / 'cache_log.jsonl'
+
+def load_and_evaluate(scenarios_path=None, use_cache=True):
+    """
+    Load scenarios.json and run every scenario through the engine once.
+    With `use_cache`, unchanged scenarios are served from the result cache.
+    Returns (scenarios, results).
+    """
+    if scenarios_path is None:
+        scenarios_path = project_root / 'scenarios' / 'scenarios.json'
+    with open(scenarios_path, 'r') as f:
+        scenarios = json.load(f)
+    if not use_cache:
+        return scenarios, run_comparison_from_json(scenarios)
+
+    cache = ResultCache(cache_path)
+    results, status = run_comparison_cached(scenarios, cache)
+    cache.save()
+    run_stats = record_run(cache_log_path, cache, status)
+    print(f"  Result cache: {run_stats['hits']} hits, {run_stats['misses']} misses.")
+    return scenarios, results
+
+def write_reports(scenarios, results, parallel=False):
+    """Fan the evaluated results out to the CSV and Excel writers."""
+    writers = [
+        ("CSV comparison matrices", lambda: generate_comparison_matrix(project_root, scenarios, results)),
+        ("Excel report", lambda: generate_excel_report(scenarios, results)),
+    ]
+    if parallel:
+        with ThreadPoolExecutor(max_workers=len(writers)) as pool:
+            futures = [(name, pool.submit(writer)) for name, writer in writers]
+            for name, future in futures:
+                future.result()  # re-raise any writer error here
+                print(f"  {name} generated successfully.")
+    else:
+        for name, writer in writers:
+            writer()
+            print(f"  {name} generated successfully.")
+
+def run_full_analysis(parallel=False, use_cache=True):
     """
     Runs all parts of the financial analysis and generates all reports.
     """
     print("--- Starting Car Ownership Cost Analysis ---")
-    
+
     try:
-        # 1. Generate the CSV comparison matrices
-        print("\n[Step 1/2] Generating CSV comparison matrices...")
-        generate_comparison_matrix()
-        print("[Step 1/2] CSV reports generated successfully.")
-        
-        # 2. Generate the detailed Excel report
-        print("\n[Step 2/2] Generating detailed Excel report...")
-        generate_excel_report()
-        print("[Step 2/2] Excel report generated successfully.")
-        
+        # 1. Load and evaluate all scenarios once
+        print("\n[Step 1/2] Loading and evaluating scenarios...")
+        scenarios, results = load_and_evaluate(use_cache=use_cache)
+        print(f"[Step 1/2] Evaluated {len(results)} scenarios.")
+
+        # 2. Write the CSV matrices and the detailed Excel report from the shared results
+        print("\n[Step 2/2] Generating CSV and Excel reports...")
+        write_reports(scenarios, results, parallel=parallel)
+        print("[Step 2/2] Reports generated successfully.")
+
         print("\n--- Analysis Complete ---")
         print("All output files have been updated.")
-        
+
     except Exception as e:
         print(f"\nAn error occurred during the analysis: {e}")
         print("Please check the data in 'scenarios/scenarios.json' and ensure all scripts in the 'Model' directory are correct.")
         sys.exit(1)
 
 if __name__ == "__main__":
-    run_full_analysis()
+    parser = argparse.ArgumentParser(description="Run the full car ownership cost analysis.")
+    parser.add_argument("--parallel", action="store_true", help="Run the CSV and Excel writers concurrently")
+    parser.add_argument("--no-cache", action="store_true", help="Recompute every scenario instead of reusing cached results")
+    args = parser.parse_args()
+    run_full_analysis(parallel=args.parallel, use_cache=not args.no_cache)
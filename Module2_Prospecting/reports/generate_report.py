@@ -1,80 +1,99 @@
+import argparse
+import hashlib
 import json
-import os
+import sys
 from pathlib import Path
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime
 
-def generate_report():
-    project_root = Path(__file__).resolve().parent.parent.parent
-    data_dir = project_root / 'Module2_Prospecting' / 'data'
-    reports_dir = project_root / 'Module2_Prospecting' / 'reports'
-    
-    # Ensure reports dir exists
-    reports_dir.mkdir(parents=True, exist_ok=True)
-    
-    db_file = data_dir / 'prospects_db.json'
-    
-    if not db_file.exists():
-        print(f"Error: {db_file} not found. Cannot generate report.")
-        return
-        
-    with open(db_file, 'r') as f:
-        db_data = json.load(f)
-        
-    prospects = db_data.get('prospects', {})
-    
-    # Filter only active listings
-    active_cars = [car for car in prospects.values() if car.get('status') == 'active']
-    
-    if not active_cars:
-        print("No active cars found. Skipping report generation.")
-        return
-        
-    # Create DataFrame
-    df = pd.DataFrame(active_cars)
-    
-    # Ensure numerics
-    df['price'] = pd.to_numeric(df['price'], errors='coerce')
-    df['miles'] = pd.to_numeric(df['miles'], errors='coerce')
-    df = df.dropna(subset=['price', 'miles'])
-    
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scrapers'))
+from change_feed import SightingsIndex
+from prospects_store import open_store
+
+FULL_DPI = 300
+PREVIEW_DPI = 72
+PREVIEW_PLOT = 'value_matrix_preview.png'   # never replaces the full-resolution value_matrix.png
+TOP_DEALS = 5
+# Fields that change what value_matrix.png shows; anything else can change without a re-render
+PLOT_FIELDS = ("vin", "price", "miles", "trim", "dealer")
+
+def _number(value):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if number != number else number  # drop NaN like pd.to_numeric + dropna
+
+def value_table(active_cars):
+    """
+    Listings with numeric price and miles, each with its expected price on the
+    linear price-vs-miles trend and its discount to it, plus the trend's
+    (slope, intercept). Plain Python, so the markdown needs no numpy/pandas.
+    """
+    rows = []
+    for car in active_cars:
+        price, miles = _number(car.get('price')), _number(car.get('miles'))
+        if price is not None and miles is not None:
+            rows.append({**car,
+                         'price': int(price) if price.is_integer() else price,
+                         'miles': int(miles) if miles.is_integer() else miles})
+
+    # Least-squares line, same as np.polyfit(miles, price, 1)
+    n = len(rows)
+    if not n:
+        return rows, (0.0, 0.0)
+    mean_x = sum(r['miles'] for r in rows) / n
+    mean_y = sum(r['price'] for r in rows) / n
+    var_x = sum((r['miles'] - mean_x) ** 2 for r in rows)
+    cov_xy = sum((r['miles'] - mean_x) * (r['price'] - mean_y) for r in rows)
+    slope = cov_xy / var_x if var_x else 0.0
+    intercept = mean_y - slope * mean_x
+
+    # "Value Score" (distance below trendline): positive means cheaper than expected (good)
+    for row in rows:
+        row['expected_price'] = slope * row['miles'] + intercept
+        row['discount_to_trend'] = row['expected_price'] - row['price']
+    return rows, (slope, intercept)
+
+def inventory_hash(rows):
+    """Content hash of what the plot draws, independent of listing order."""
+    plotted = sorted(([row.get(field) for field in PLOT_FIELDS] for row in rows), key=json.dumps)
+    return hashlib.sha256(json.dumps(plotted).encode()).hexdigest()
+
+def render_value_matrix(rows, trend, top_deals, plot_path, dpi):
+    # Heavy imports only when a plot is actually drawn; Agg needs no display (cron)
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import numpy as np
+    import pandas as pd
+    import seaborn as sns
+
+    df = pd.DataFrame(rows)
+
     # ---- 1. Generate Scatter Plot with Trendline ----
-    
+
     plt.figure(figsize=(12, 8))
     sns.set_theme(style="whitegrid")
-    
+
     # Plot scatter
     ax = sns.scatterplot(
-        data=df, 
-        x="miles", 
-        y="price", 
-        hue="trim", 
-        palette="viridis", 
-        s=100, 
+        data=df,
+        x="miles",
+        y="price",
+        hue="trim",
+        palette="viridis",
+        s=100,
         alpha=0.8,
         edgecolor="w"
     )
-    
-    # Calculate trendline (degrees=1 for linear)
-    z = np.polyfit(df['miles'], df['price'], 1)
-    p = np.poly1d(z)
-    
+
     # Plot trendline
+    p = np.poly1d(trend)
     x_trend = np.linspace(df['miles'].min(), df['miles'].max(), 100)
     plt.plot(x_trend, p(x_trend), "r--", alpha=0.5, label="Market Average Trend")
-    
-    # Calculate "Value Score" (distance below trendline)
-    # Negative value means it's cheaper than expected (good)
-    df['expected_price'] = p(df['miles'])
-    df['discount_to_trend'] = df['expected_price'] - df['price']
-    
-    # Annotate the top 5 deals (highest discount to trend)
-    top_deals = df.sort_values(by='discount_to_trend', ascending=False).head(5)
-    
-    for _, row in top_deals.iterrows():
+
+    # Annotate the top deals (highest discount to trend)
+    for row in top_deals:
         plt.annotate(
             f"{row['dealer']}\n${row['price']:,.0f}",
             (row['miles'], row['price']),
@@ -83,30 +102,79 @@ def generate_report():
             fontsize=9,
             weight='bold'
         )
-        
+
     plt.title("BMW iX CPO Relative Market Value", fontsize=16, pad=15)
     plt.xlabel("Mileage", fontsize=12)
     plt.ylabel("Price ($)", fontsize=12)
-    
+
     # Format axes
-    ax.yaxis.set_major_formatter(plt.matplotlib.ticker.StrMethodFormatter('{x:,.0f}'))
-    ax.xaxis.set_major_formatter(plt.matplotlib.ticker.StrMethodFormatter('{x:,.0f}'))
-    
+    ax.yaxis.set_major_formatter(matplotlib.ticker.StrMethodFormatter('{x:,.0f}'))
+    ax.xaxis.set_major_formatter(matplotlib.ticker.StrMethodFormatter('{x:,.0f}'))
+
     # Save plot
-    plot_path = reports_dir / 'value_matrix.png'
     plt.tight_layout()
-    plt.savefig(plot_path, dpi=300)
+    plt.savefig(plot_path, dpi=dpi)
     plt.close()
-    
+
+def generate_report(dpi=FULL_DPI, force=False, preview=False):
+    project_root = Path(__file__).resolve().parent.parent.parent
+    data_dir = project_root / 'Module2_Prospecting' / 'data'
+    reports_dir = project_root / 'Module2_Prospecting' / 'reports'
+
+    # Ensure reports dir exists
+    reports_dir.mkdir(parents=True, exist_ok=True)
+
+    # Only active listings are read from the store (the JSON event log or
+    # SQLite) instead of loading the whole prospects_db.json view
+    store = open_store(data_dir)
+    stats = store.stats()
+    active_cars = store.active_vehicles()
+    store.close()
+    sightings = SightingsIndex(data_dir).load()
+
+    if not stats['total_tracked']:
+        print(f"Error: no prospects found in {data_dir}. Cannot generate report.")
+        return
+
+    rows, trend = value_table(active_cars)
+    if not rows:
+        print("No active cars found. Skipping report generation.")
+        return
+
+    # Annotate the top 5 deals (highest discount to trend)
+    top_deals = sorted(rows, key=lambda row: row['discount_to_trend'], reverse=True)[:TOP_DEALS]
+
+    # Re-render only when the plotted inventory (or the resolution) changed
+    plot_path = reports_dir / 'value_matrix.png'
+    state_file = reports_dir / '.value_matrix.json'
+    state = {"inventory_hash": inventory_hash(rows), "dpi": dpi}
+    previous = {}
+    if state_file.exists():
+        with open(state_file, 'r') as f:
+            previous = json.load(f)
+    if preview:
+        # A preview goes to its own file and is not recorded as the rendered state,
+        # so the next full run still redraws value_matrix.png
+        preview_path = reports_dir / PREVIEW_PLOT
+        render_value_matrix(rows, trend, top_deals, preview_path, dpi)
+        print(f"Preview saved: {preview_path} ({dpi} dpi)")
+    elif not force and plot_path.exists() and previous == state:
+        print(f"Active inventory unchanged since last render. Keeping {plot_path.name}")
+    else:
+        render_value_matrix(rows, trend, top_deals, plot_path, dpi)
+        with open(state_file, 'w') as f:
+            json.dump(state, f, indent=2)
+        print(f"Plot saved: {plot_path} ({dpi} dpi)")
+
     # ---- 2. Generate Markdown Report ----
-    
+
     today = datetime.now().strftime("%B %d, %Y")
-    
+
     md_content = f"""# BMW iX Prospecting Report
 *Generated on {today}*
 
 This report analyzes the active CPO market for BMW iX models within 100 miles of 22015 under $55,000.  
-Total Active Prospects Tracked: **{len(df)}**
+Total Active Prospects Tracked: **{len(rows)}**
 
 ## Relative Market Value Matrix
 The chart below maps Price vs. Mileage. The red dashed line represents the average market depreciation trend.
@@ -118,20 +186,29 @@ The chart below maps Price vs. Mileage. The red dashed line represents the avera
 These vehicles are priced the furthest below the expected market average for their mileage.
 
 """
-    
-    for idx, row in top_deals.iterrows():
+
+    for row in top_deals:
         md_content += f"### {row['year_make_model']} {row['trim']} - {row['dealer']}\n"
         md_content += f"- **Price:** ${row['price']:,.0f} *(Est. ${row['discount_to_trend']:,.0f} below market average)*\n"
         md_content += f"- **Mileage:** {row['miles']:,} miles\n"
         md_content += f"- **First Seen:** {row.get('first_seen', 'Unknown')}\n"
+        days_listed = sightings.days_listed(row['vin'])
+        if days_listed:
+            since_cut = sightings.days_since_price_cut(row['vin'])
+            last_cut = f"last price cut {since_cut} days ago" if since_cut is not None else "no price cuts yet"
+            md_content += f"- **Listed:** {days_listed} days ({last_cut})\n"
         md_content += f"- [View Vehicle Listing]({row['url']})\n\n"
-        
+
     report_path = reports_dir / 'daily_summary.md'
     with open(report_path, 'w') as f:
         f.write(md_content)
-        
+
     print(f"Report generated successfully: {report_path}")
-    print(f"Plot saved: {plot_path}")
 
 if __name__ == "__main__":
-    generate_report()
+    parser = argparse.ArgumentParser(description="Generate the value matrix plot and daily markdown summary.")
+    parser.add_argument("--preview", action="store_true", help=f"Render the plot at {PREVIEW_DPI} dpi to {PREVIEW_PLOT} for a quick look")
+    parser.add_argument("--dpi", type=int, default=FULL_DPI, help="Plot resolution (default: %(default)s)")
+    parser.add_argument("--force", action="store_true", help="Re-render the plot even if the active inventory is unchanged")
+    args = parser.parse_args()
+    generate_report(dpi=PREVIEW_DPI if args.preview else args.dpi, force=args.force, preview=args.preview)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark and correctness check for card_parser.
+
+1. Correctness: re-parses every `raw_text` in the prospects store and
+   compares the result with the fields recorded for that VIN.
+2. Throughput: parses N synthetic cards (varied years, trims, dealers,
+   distances, optional "Contact Dealer for Images" line) with card_parser and
+   with the original line-by-line loop, and reports cards/second for each.
+
+Usage:
+    python3 Module2_Prospecting/scrapers/benchmark_card_parser.py --cards 20000
+"""
+
+import argparse
+import random
+import time
+from pathlib import Path
+
+from card_parser import parse_card
+from prospects_store import open_store
+
+project_root = Path(__file__).resolve().parent.parent.parent
+data_dir = project_root / 'Module2_Prospecting' / 'data'
+
+ROUNDS = 3
+CHECKED_FIELDS = ("year_make_model", "trim", "price", "miles", "dealer")
+
+TRIMS = ["iX xDrive50", "iX M60", "iX xDrive40", "i4 eDrive40", "i4 M50", "X5 xDrive45e", "i7 xDrive60"]
+SERIES = ["iX", "i4", "X5", "i7"]
+DEALERS = ["BMW of Sterling", "Hendrick BMW Northlake", "BMW of Mt. Laurel", "Union Park BMW", "BMW of Wilkes-Barre", "Passport BMW"]
+
+
+def legacy_parse(text):
+    """The per-line chain formerly inlined in run_scraper, kept as the baseline."""
+    lines = [L.strip() for L in text.split('\n') if L.strip() and L.strip() != 'Contact Dealer for Images']
+    price = 999999
+    miles = 0
+    year_make_model = ""
+    trim = ""
+    dealer = ""
+    for line in lines:
+        clean_line = line.replace(",", "").strip()
+        if not year_make_model and "BMW iX" in line:
+            year_make_model = line
+        elif not trim and "xDrive" in line or "M60" in line:
+            trim = line
+        elif line.startswith("$"):
+            try: price = int(clean_line.replace("$", ""))
+            except: pass
+        elif clean_line.isdigit() and len(clean_line) > 2:
+            miles = int(clean_line)
+        elif "BMW of" in line or ("BMW" in line and "-" in line):
+            dealer = line.split("-")[0].strip()
+    return {"year_make_model": year_make_model, "trim": trim, "price": price, "miles": miles, "dealer": dealer}
+
+
+def synthetic_cards(n, seed=0):
+    rng = random.Random(seed)
+    cards = []
+    for _ in range(n):
+        expected = {
+            "year_make_model": f"{rng.choice([2022, 2023, 2024, 2025])} BMW {rng.choice(SERIES)}",
+            "trim": rng.choice(TRIMS),
+            "price": rng.randrange(30000, 90000),
+            "miles": rng.randrange(1000, 80000),
+            "dealer": rng.choice(DEALERS),
+        }
+        distance = round(rng.uniform(1, 400), rng.choice([0, 1]))
+        lines = [
+            expected["year_make_model"],
+            expected["trim"],
+            "DEALER PRICE",
+            "MILES",
+            f"${expected['price']:,}",
+            f"{expected['miles']:,}",
+            f"{expected['dealer']} - {distance:g} mi",
+        ]
+        if rng.random() < 0.3:
+            lines.insert(0, "Contact Dealer for Images")
+        cards.append(("\n".join(lines), expected))
+    return cards
+
+
+def check_prospects():
+    """Compare parsed raw_text with the fields stored in the prospects store."""
+    store = open_store(data_dir)
+    prospects = store.load()
+    store.close()
+    samples = [car for car in prospects.values() if car.get('raw_text')]
+    mismatches = 0
+    for car in samples:
+        parsed = parse_card(car['raw_text'], car.get('url', '')).to_dict()
+        diffs = {field: (car.get(field), parsed[field]) for field in CHECKED_FIELDS if car.get(field) != parsed[field]}
+        if diffs:
+            mismatches += 1
+            print(f"  MISMATCH {car['vin']}: {diffs}")
+    print(f"Prospects store: {len(samples) - mismatches}/{len(samples)} raw_text samples match the stored fields")
+    return mismatches
+
+
+def benchmark(n):
+    cards = synthetic_cards(n)
+    results = {}
+    for name, parse in (("legacy", legacy_parse), ("card_parser", lambda text: parse_card(text).to_dict())):
+        # Best of a few rounds, to keep scheduler noise out of the comparison
+        elapsed = float('inf')
+        for _ in range(ROUNDS):
+            start = time.perf_counter()
+            parsed = [parse(text) for text, _ in cards]
+            elapsed = min(elapsed, time.perf_counter() - start)
+        correct = sum(all(p[field] == expected[field] for field in CHECKED_FIELDS) for p, (_, expected) in zip(parsed, cards))
+        results[name] = elapsed
+        print(f"{name:<12} {n / elapsed:>12,.0f} cards/s   {correct / n:>7.1%} fully correct")
+    print(f"Speedup: {results['legacy'] / results['card_parser']:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark and verify the card text parser.")
+    parser.add_argument("--cards", type=int, default=10000, help="Number of synthetic cards to parse")
+    args = parser.parse_args()
+
+    mismatches = check_prospects()
+    print()
+    benchmark(args.cards)
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,207 +1,412 @@
 import sys
 import json
 import asyncio
+import argparse
+import time
 from pathlib import Path
-from playwright.async_api import async_playwright
-from playwright_stealth import Stealth
+from urllib.parse import urlencode
+
+from card_parser import parse_card, vin_from_url
+from inventory_api import InventoryCapture
+from listing_identity import has_vin
+from resource_filter import ResourceFilter
+from scrape_archive import ScrapeArchive, load_archive
+from scrape_stream import ScrapeStream
 
 # Setup output dir
 project_root = Path(__file__).parent.parent.parent
 data_dir = project_root / 'Module2_Prospecting' / 'data'
 data_dir.mkdir(parents=True, exist_ok=True)
-output_file = data_dir / 'raw_scrape.json'
+output_file = data_dir / 'raw_scrape.jsonl'
+queries_file = data_dir / 'search_queries.json'
+REPLAY_OUTPUT = 'replay_scrape.jsonl'   # written inside the archive directory by --replay
 
-URL = "https://www.bmwusa.com/certified-preowned-search/results?ZipCode=22015&Radius=100&Type=CPO&Series=iX&Year=2024%7C2025%7C2026&Price=$40,000+-+$49,999|$50,000+-+$59,999"
+SEARCH_URL = "https://www.bmwusa.com/certified-preowned-search/results"
 MAX_PRICE = 55000
+DEFAULT_CONCURRENCY = 3
 
-scraped_vehicles = []
-seen_vins = set()
+# The original single search: zip 22015, 100 mi, 2024-2026 iX between $40k and $60k
+DEFAULT_QUERY = {
+    "zip": "22015",
+    "radius": 100,
+    "series": "iX",
+    "years": [2024, 2025, 2026],
+    "price_ranges": ["$40,000 - $49,999", "$50,000 - $59,999"],
+    "max_price": MAX_PRICE
+}
 
-async def handle_response(response):
-    # Print a trace of JSON endpoints for discovery
-    if "json" in response.url or "api" in response.url or "graphql" in response.url or "vehicle" in response.url or "inventory" in response.url:
-        print(f"API Trace: {response.url}")
-        
-    # Intercept the specific API. We check for 'vehicle' or 'inventory' in the url just in case
-    if "inventoryservices" in response.url or "graphql" in response.url:
-        try:
-            # Try to parse the API JSON
-            data = await response.json()
-            # BMW API usually returns { "results": [...] } or similar
-            # Let's handle both "results" and direct array to be safe
-            vehicles = []
-            if isinstance(data, dict):
-                if "results" in data:
-                    vehicles = data["results"]
-                elif "vehicles" in data:
-                    vehicles = data["vehicles"]
-                elif "data" in data and "results" in data["data"]:
-                    vehicles = data["data"]["results"]
-            elif isinstance(data, list):
-                vehicles = data
-                
-            if vehicles:
-                print(f"Captured {len(vehicles)} vehicles in this payload from {response.url}")
-                for vehicle in vehicles:
-                    # Get VIN to avoid duplicates from multiple API calls
-                    vin = vehicle.get("vin", "Unknown")
-                    if vin in seen_vins:
-                        continue
-                        
-                    # basic safety for price/cpo
-                    # price could be nested or string
-                    price_val = vehicle.get("price", vehicle.get("internetPrice", vehicle.get("sellingPrice", 999999)))
-                    # try convert to int if it's string
-                    if isinstance(price_val, str):
-                        price_val = int(price_val.replace("$","").replace(",","").split(".")[0])
-                    
-                    # cpo could be boolean or string
-                    cpo_status = vehicle.get("certified", vehicle.get("cpo", False))
-                    is_cpo = str(cpo_status).lower() in ["true", "1", "yes"]
-                    
-                    if price_val <= MAX_PRICE and is_cpo:
-                        scraped_vehicles.append(vehicle)
-                        seen_vins.add(vin)
-        except Exception as e:
-            # We silently ignore non-json responses or parsing errors for unrelated URLs
-            pass
-
-async def run_scraper():
-    print(f"Starting scraper. Targeted zip 22015, radius 100mi, max price ${MAX_PRICE}...")
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        context = await browser.new_context(
-            user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
-            viewport={'width': 1280, 'height': 800}
-        )
-        page = await context.new_page()
+# Upper bounds (ms) for each wait; every wait returns as soon as the page is ready.
+# A query can override any of them with a "wait_limits" object.
+WAIT_LIMITS = {
+    "initial": 8000,     # first inventory payload / cards / zip input after navigation
+    "zip": 3000,         # dealer list after submitting the zip
+    "dealer": 5000,      # results after picking a dealer
+    "inventory": 10000   # vehicle cards rendered
+}
+ZIP_INPUT_SELECTOR = "input[name*='zip'], input[id*='zip'], input[placeholder*='ZIP']"
+DEALER_BUTTON_SELECTOR = "button:has-text('Select')"
+CARD_TEXT_SELECTOR = "text=DEALER PRICE"
+# A card is the largest element around a "DEALER PRICE" label that holds just one vehicle;
+# its detail link, when it has one, gives the VIN
+DETAIL_LINK_SELECTOR = "a[href*='/certified-preowned-search/detail/']"
+MAX_CARD_TEXT = 500
+
+CONTEXT_OPTIONS = {
+    "user_agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
+    "viewport": {'width': 1280, 'height': 800}
+}
+
+def build_url(query):
+    """Search results URL for one query (zip, radius, series, years, price ranges)."""
+    params = [
+        ("ZipCode", query["zip"]),
+        ("Radius", query.get("radius", 100)),
+        ("Type", "CPO"),
+        ("Series", query.get("series", "iX")),
+    ]
+    if query.get("years"):
+        params.append(("Year", "|".join(str(y) for y in query["years"])))
+    if query.get("price_ranges"):
+        params.append(("Price", "|".join(query["price_ranges"])))
+    return f"{SEARCH_URL}?{urlencode(params, safe='$,')}"
+
+def query_label(query):
+    return f"{query['zip']}/{query.get('radius', 100)}mi/{query.get('series', 'iX')}"
+
+def query_key(query):
+    """Identifies a query by all of its parameters (the label only shows zip/radius/series)."""
+    return json.dumps(query, sort_keys=True)
+
+URL = build_url(DEFAULT_QUERY)
+
+def load_queries(path=None):
+    """Query list from a JSON file (a list of query objects), falling back to DEFAULT_QUERY."""
+    path = Path(path) if path else queries_file
+    if not path.exists():
+        return [DEFAULT_QUERY]
+    with open(path, 'r') as f:
+        queries = json.load(f)
+    # Fill anything a query leaves out from the default search
+    return [{**DEFAULT_QUERY, **q} for q in queries]
+
+class PhaseTimer:
+    """Wall time per scrape phase, plus what ended each wait."""
+
+    def __init__(self):
+        self.phases = []
+        self.last = time.perf_counter()
+
+    def mark(self, phase, reason=""):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last, reason))
+        self.last = now
+
+    def summary(self):
+        total = sum(seconds for _, seconds, _ in self.phases)
+        parts = [f"{phase} {seconds:.1f}s" + (f" ({reason})" if reason else "") for phase, seconds, reason in self.phases]
+        return f"{', '.join(parts)} = {total:.1f}s"
+
+async def wait_for_ready(page, timeout_ms, selectors=(), event=None, network_idle=False):
+    """
+    Wait until any readiness signal fires: one of `selectors` becomes visible,
+    `event` (set when an inventory payload is captured) is set, or the network
+    goes idle. Returns the name of the signal, or "timeout" after `timeout_ms`.
+    """
+    waiters = {}
+    if event is not None:
+        if event.is_set():
+            return "api"
+        waiters[asyncio.ensure_future(event.wait())] = "api"
+    for selector in selectors:
+        waiters[asyncio.ensure_future(page.wait_for_selector(selector, state="visible", timeout=timeout_ms))] = selector
+    if network_idle:
+        waiters[asyncio.ensure_future(page.wait_for_load_state("networkidle", timeout=timeout_ms))] = "networkidle"
+
+    pending = set(waiters)
+    reason = "timeout"
+    deadline = time.perf_counter() + timeout_ms / 1000
+    try:
+        while pending and reason == "timeout":
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                # A selector or load-state wait that timed out is not a signal; keep waiting on the others
+                if task.exception() is None:
+                    reason = waiters[task]
+                    break
+    finally:
+        for task in pending:
+            task.cancel()
+        # Collect cancelled waits so they do not surface as "exception never retrieved"
+        await asyncio.gather(*pending, return_exceptions=True)
+    return reason
+
+def parse_cards(cards_data, scraped_vehicles, seen_vins, max_price=MAX_PRICE, on_vehicle=None):
+    """Turn the raw card text/links from the results page into vehicle records."""
+    for raw in cards_data:
+        text = raw['text']
+        vin = vin_from_url(raw['url'])
+        # Cards without a detail link are told apart by their text
+        key = vin if has_vin(vin) else text
+
+        if key in seen_vins or 'BMW' not in text:
+            continue
+        seen_vins.add(key)
+
+        record = parse_card(text, raw['url'])
+        if record.price is not None and record.price <= max_price:
+            vehicle = record.to_dict()
+            scraped_vehicles.append(vehicle)
+            if on_vehicle:
+                on_vehicle(vehicle)
+
+async def extract_cards(page):
+    """Text, HTML and (optional) detail link of every rendered vehicle card (DOM fallback)."""
+    return await page.locator(CARD_TEXT_SELECTOR).evaluate_all('''(labels, [linkSelector, maxText]) => {
+        const prices = el => (el.innerText || '').split('DEALER PRICE').length - 1;
+        const cards = new Set();
+        for (const label of labels) {
+            let el = label;
+            while (el.parentElement && prices(el.parentElement) === 1 && el.parentElement.innerText.length < maxText) {
+                el = el.parentElement;
+            }
+            if ((el.innerText || '').includes('MILES')) cards.add(el);
+        }
+        return Array.from(cards, el => {
+            const a = el.matches(linkSelector) ? el : el.querySelector(linkSelector) || el.querySelector('a[href]');
+            return {url: a ? a.href : "", text: el.innerText, html: el.outerHTML};
+        });
+    }''', [DETAIL_LINK_SELECTOR, MAX_CARD_TEXT])
+
+async def scrape_query(context, query, screenshot=None, archive=None, stream=None):
+    """
+    Run one search in its own page of `context` and return the vehicles it found.
+    With a `stream`, each vehicle is written out as soon as it is parsed.
+    The inventory API is the primary source: once a payload is captured the
+    remaining result pages are fetched directly and the DOM is never read.
+    The card DOM is only parsed when no API payload was seen.
+    """
+    label = query_label(query)
+    key = query_key(query)
+    max_price = query.get("max_price", MAX_PRICE)
+    limits = {**WAIT_LIMITS, **query.get("wait_limits", {})}
+    on_vehicle = stream.write if stream else None
+    capture = InventoryCapture(max_price, label, archive, on_vehicle=on_vehicle, key=key)
+    scraped_vehicles = []
+    timer = PhaseTimer()
+
+    # Imported here so replay mode runs without a browser installed
+    from playwright_stealth import Stealth
+
+    page = await context.new_page()
+    try:
         await Stealth().apply_stealth_async(page)
-        
+
         # Listen for API responses
-        page.on("response", handle_response)
-        
-        print(f"Navigating to: {URL}")
+        page.on("response", capture.handle_response)
+
+        url = build_url(query)
+        print(f"[{label}] Navigating to: {url}")
         # Use wait_until="load" to avoid timeout if networkidle never fires due to tracking scripts
-        await page.goto(URL, wait_until="load")
-        
-        # Wait a chunk of time for React/SPA to load initial API data
-        print("Waiting for page and initial APIs to settle...")
-        await page.wait_for_timeout(8000)
-        await page.screenshot(path="debug_start.png")
-            
-        # Try interacting with zip code if it's there
+        await page.goto(url, wait_until="load")
+        timer.mark("goto")
+
+        # Wait for the React/SPA to deliver inventory data or render something we can act on
+        print(f"[{label}] Waiting for page and initial APIs to settle...")
+        reason = await wait_for_ready(page, limits["initial"], (CARD_TEXT_SELECTOR, ZIP_INPUT_SELECTOR), capture.seen)
+        timer.mark("initial", reason)
+        if screenshot:
+            await page.screenshot(path=screenshot)
+
+        # Try interacting with zip code if the API has not answered yet
+        if not capture.seen.is_set():
+            try:
+                print(f"[{label}] Looking for generic zip code inputs...")
+                inputs = await page.locator(ZIP_INPUT_SELECTOR).all()
+                for inp in inputs:
+                    if await inp.is_visible():
+                        print(f"[{label}] Found ZIP input, filling {query['zip']}...")
+                        await inp.fill(query["zip"])
+                        await page.keyboard.press("Enter")
+                        reason = await wait_for_ready(page, limits["zip"], (DEALER_BUTTON_SELECTOR,), capture.seen, network_idle=True)
+                        timer.mark("zip", reason)
+
+                        # Also need to select a dealer!
+                        select_btns = await page.locator(DEALER_BUTTON_SELECTOR).all()
+                        for btn in select_btns:
+                            if await btn.is_visible():
+                                print(f"[{label}] Selecting dealer...")
+                                await btn.click()
+                                reason = await wait_for_ready(page, limits["dealer"], (CARD_TEXT_SELECTOR,), capture.seen, network_idle=True)
+                                timer.mark("dealer", reason)
+                                break
+                        break
+            except Exception as e:
+                print(f"[{label}] Zip handler failed: {e}")
+
+        if capture.seen.is_set():
+            # Fast path: page through the API directly
+            pages = await capture.fetch_remaining_pages(context.request)
+            timer.mark("api", f"{pages + 1} pages")
+            if capture.failed_pages:
+                # A partial result must not count as the query's full inventory
+                raise RuntimeError(f"{capture.failed_pages} of {pages} result pages could not be fetched")
+            scraped_vehicles = capture.vehicles
+        else:
+            print(f"[{label}] No inventory API payload seen. Falling back to vehicle cards...")
+            reason = await wait_for_ready(page, limits["inventory"], (CARD_TEXT_SELECTOR,))
+            timer.mark("inventory", reason)
+            cards_data = await extract_cards(page)
+            if archive:
+                archive.record_cards(label, key, cards_data)
+            print(f"[{label}] Found {len(cards_data)} vehicle cards.")
+            parse_cards(cards_data, scraped_vehicles, set(), max_price, on_vehicle)
+            timer.mark("extract")
+    finally:
+        await page.close()
+
+    sources = {}
+    for vehicle in scraped_vehicles:
+        sources[vehicle["source"]] = sources.get(vehicle["source"], 0) + 1
+    print(f"[{label}] {len(scraped_vehicles)} vehicles {sources}. Timings: {timer.summary()}")
+    if stream:
+        stream.query_done(label, len(scraped_vehicles), key)
+    return scraped_vehicles
+
+async def run_queries(browser, queries, concurrency=DEFAULT_CONCURRENCY, resource_filter=None, archive=None, stream=None):
+    """
+    Run every query over a pool of at most `concurrency` browser contexts.
+    Each query borrows a context, runs in a fresh page and hands it back, so
+    wall time grows with len(queries) / concurrency rather than len(queries).
+    Failed queries come back as None.
+    """
+    pool = asyncio.Queue()
+    options = CONTEXT_OPTIONS
+    if resource_filter:
+        # Service workers fetch outside the context's routes, so they would bypass the filter
+        options = {**CONTEXT_OPTIONS, "service_workers": "block"}
+    contexts = [await browser.new_context(**options) for _ in range(max(1, min(concurrency, len(queries))))]
+    for context in contexts:
+        if resource_filter:
+            await resource_filter.attach(context)
+        pool.put_nowait(context)
+
+    # The debug screenshot only makes sense when a single search is running
+    screenshot = "debug_start.png" if len(queries) == 1 else None
+
+    async def run_one(query):
+        context = await pool.get()
         try:
-            print("Looking for generic zip code inputs...")
-            inputs = await page.locator("input[name*='zip'], input[id*='zip'], input[placeholder*='ZIP']").all()
-            for inp in inputs:
-                if await inp.is_visible():
-                    print("Found ZIP input, filling 22015...")
-                    await inp.fill("22015")
-                    await page.keyboard.press("Enter")
-                    await page.wait_for_timeout(3000)
-                    
-                    # Also need to select a dealer!
-                    select_btns = await page.locator("button:has-text('Select')").all()
-                    for btn in select_btns:
-                        if await btn.is_visible():
-                            print("Selecting dealer...")
-                            await btn.click()
-                            await page.wait_for_timeout(5000)
-                            break
-                    print("Waiting 10 seconds for Firestore data to load...")
-                    await page.wait_for_timeout(10000)
-                    
-                    print("Extracting vehicle cards via JS evaluate...")
-                    
-                    # Since Shadow DOMs or complex nesting might be hiding text from simple locators, 
-                    # we will evaluate a script that walks the DOM and finds all blocks containing money and miles.
-                    # As a brute-force approach for Phase 1, we just return the full inner text of elements matching vehicle card patterns.
-                    
-                    cards_data = await page.evaluate('''() => {
-                        let elements = Array.from(document.querySelectorAll('*'));
-                        let cards = [];
-                        
-                        elements.forEach(el => {
-                            let text = el.innerText;
-                            if (text && text.includes('DEALER PRICE') && text.includes('MILES')) {
-                                // Only push elements that seem to be the direct container (not the body or app root)
-                                if (text.length < 500) {
-                                    let href = "";
-                                    if (el.tagName === 'A') {
-                                        href = el.href;
-                                    } else {
-                                        let a = el.querySelector('a');
-                                        if (a) href = a.href;
-                                    }
-                                    
-                                    cards.push({
-                                        url: href || "",
-                                        text: text
-                                    });
-                                }
-                            }
-                        });
-                        return cards;
-                    }''')
-                    
-                    print(f"Found {len(cards_data)} potential vehicle containers via JS evaluation.")
-                    
-                    seen_vins = set()
-                    
-                    for raw in cards_data:
-                        text = raw['text']
-                        href = raw['url']
-                        vin = href.split("/")[-1] if href else "Unknown"
-                        
-                        if vin in seen_vins or 'BMW' not in text:
-                            continue
-                        seen_vins.add(vin)
-                        
-                        lines = [L.strip() for L in text.split('\n') if L.strip() and L.strip() != 'Contact Dealer for Images']
-                        
-                        price = 999999
-                        miles = 0
-                        year_make_model = ""
-                        trim = ""
-                        dealer = ""
-                        
-                        for line in lines:
-                            clean_line = line.replace(",", "").strip()
-                            if not year_make_model and "BMW iX" in line:
-                                year_make_model = line
-                            elif not trim and "xDrive" in line or "M60" in line:
-                                trim = line
-                            elif line.startswith("$"):
-                                try: price = int(clean_line.replace("$", ""))
-                                except: pass
-                            elif clean_line.isdigit() and len(clean_line) > 2:
-                                # Likely mileage if it's just a number
-                                miles = int(clean_line)
-                            elif "BMW of" in line or ("BMW" in line and "-" in line):
-                                dealer = line.split("-")[0].strip()
-                        
-                        if price <= MAX_PRICE:
-                            scraped_vehicles.append({
-                                "vin": vin,
-                                "year_make_model": year_make_model,
-                                "trim": trim,
-                                "price": price,
-                                "miles": miles,
-                                "dealer": dealer,
-                                "url": href,
-                                "raw_text": text
-                            })
-                    break
+            return await scrape_query(context, query, screenshot, archive, stream)
         except Exception as e:
-            print(f"Zip handler failed: {e}")
+            # One failing search should not cost us the rest of the run
+            print(f"[{query_label(query)}] Query failed: {e}")
+            return None
+        finally:
+            pool.put_nowait(context)
+
+    try:
+        return await asyncio.gather(*(run_one(query) for query in queries))
+    finally:
+        for context in contexts:
+            await context.close()
 
-        await browser.close()
-        
-    print(f"\nScraping complete. Found {len(scraped_vehicles)} CPO iX's under $55k!")
-    print(f"Saving to {output_file}...")
-    
-    with open(output_file, 'w') as f:
-        json.dump(scraped_vehicles, f, indent=2)
+async def run_scraper(queries=None, concurrency=DEFAULT_CONCURRENCY, resource_filter=None, record_dir=None, output_path=None, resume=False):
+    from playwright.async_api import async_playwright
+
+    queries = queries or [DEFAULT_QUERY]
+    stream = ScrapeStream(output_path or output_file, resume=resume)
+    if stream.completed_queries:
+        queries = [q for q in queries if query_key(q) not in stream.completed_queries]
+        print(f"Resuming: {len(stream.completed_queries)} queries already done, {stream.written} vehicles already saved.")
+    print(f"Starting scraper. {len(queries)} queries, up to {concurrency} at a time...")
+    print(f"Streaming vehicles to {stream.path}...")
+    stream.start_run(query_label(q) for q in queries)
+    archive = ScrapeArchive(record_dir, queries) if record_dir else None
+    try:
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True)
+            try:
+                per_query = await run_queries(browser, queries, concurrency, resource_filter, archive, stream)
+            finally:
+                await browser.close()
+        failed = sum(1 for vehicles in per_query if vehicles is None)
+        if not failed:
+            stream.complete()
+    finally:
+        stream.close()
+        if archive:
+            archive.close()
+
+    print(f"\nScraping complete. Found {stream.written} CPO vehicles across {len(queries)} queries!")
+    if failed:
+        print(f"Warning: {failed} queries failed; the run is marked incomplete. Re-run with --resume to finish it.")
+    if resource_filter:
+        print(f"Resource filter: {resource_filter.summary()}")
+
+def replay_queries(archive_dir, stream=None):
+    """Run the extraction pipeline over a recorded archive, offline -> per-query vehicle lists."""
+    queries, responses, cards = load_archive(archive_dir)
+    on_vehicle = stream.write if stream else None
+    per_query = []
+    for query in queries:
+        label = query_label(query)
+        key = query_key(query)
+        max_price = query.get("max_price", MAX_PRICE)
+        capture = InventoryCapture(max_price, label, verbose=False, on_vehicle=on_vehicle)
+        for response in responses[key]:
+            capture.add_payload(response["body"], response["url"])
+        # Same precedence as a live run: API first, cards only when no payload was seen
+        if capture.seen.is_set():
+            vehicles = capture.vehicles
+        else:
+            vehicles = []
+            parse_cards(cards[key], vehicles, set(), max_price, on_vehicle)
+        per_query.append(vehicles)
+        if stream:
+            stream.query_done(label, len(vehicles), key)
+    return queries, per_query
+
+def run_replay(archive_dir, repeat=1, output_path=None):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        queries, per_query = replay_queries(archive_dir)
+    elapsed = time.perf_counter() - start
+    parsed = sum(len(vehicles) for vehicles in per_query) * repeat
+    print(f"Replayed {archive_dir} x{repeat}: {len(queries)} queries "
+          f"in {elapsed:.3f}s ({parsed / elapsed if elapsed else 0:,.0f} vehicles/s)")
+
+    # One more pass through the stream writer, exactly as a live run would save it.
+    # It goes next to the archive unless asked otherwise: a replay must not replace today's scrape
+    stream = ScrapeStream(output_path or Path(archive_dir) / REPLAY_OUTPUT)
+    try:
+        stream.start_run(query_label(q) for q in queries)
+        replay_queries(archive_dir, stream)
+        stream.complete()
+    finally:
+        stream.close()
+    print(f"Saved {stream.written} vehicles to {stream.path}")
 
 if __name__ == "__main__":
-    asyncio.run(run_scraper())
+    parser = argparse.ArgumentParser(description="Scrape BMW CPO inventory for one or more searches.")
+    parser.add_argument("--queries", type=str, default=None, help=f"JSON list of searches (default: {queries_file.name} if present)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Maximum searches (browser contexts) running at once")
+    parser.add_argument("--no-block", action="store_true", help="Load every resource (images, fonts, trackers) instead of filtering them")
+    parser.add_argument("--filter-config", type=str, default=None, help="JSON file overriding the resource filter allow/deny lists")
+    parser.add_argument("--record", type=str, default=None, help="Save API responses and card HTML from this run to an archive directory")
+    parser.add_argument("--replay", type=str, default=None, help="Re-run extraction offline from a recorded archive directory")
+    parser.add_argument("--output", type=str, default=None, help=f"JSON Lines stream to write vehicles to (default: {output_file.name}; with --replay, {REPLAY_OUTPUT} in the archive)")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted run: skip finished queries and keep vehicles already saved")
+    parser.add_argument("--repeat", type=int, default=1, help="With --replay, run the extraction this many times (benchmarking)")
+    args = parser.parse_args()
+
+    if args.replay:
+        run_replay(args.replay, args.repeat, args.output)
+        sys.exit(0)
+
+    resource_filter = None
+    if not args.no_block:
+        resource_filter = ResourceFilter.from_file(args.filter_config) if args.filter_config else ResourceFilter()
+    asyncio.run(run_scraper(load_queries(args.queries), args.concurrency, resource_filter, args.record, args.output, args.resume))
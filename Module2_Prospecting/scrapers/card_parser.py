@@ -0,0 +1,126 @@
+"""
+Single-pass parser for BMW CPO search result cards.
+
+A card's innerText looks like:
+
+    Contact Dealer for Images
+    2024 BMW iX
+    iX xDrive50
+    DEALER PRICE
+    MILES
+    $49,498
+    23,676
+    BMW of Sterling - 17.9 mi
+
+Cards in this standard layout are parsed by a single precompiled pattern
+over the whole text (one C-level pass, no per-line Python work). Anything
+that deviates falls back to a line classifier that looks at each line once,
+using cheap string checks: '$' lines are prices, "<year> BMW ..." is the
+year/make/model, other numeric lines are miles, "<dealer> - <n> mi" is the
+dealer and distance, and a drive/M badge marks the trim. Labels and
+unrecognised lines are skipped, and the first line of each kind wins, so a
+later line can never overwrite an earlier field.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+LABELS = frozenset(("DEALER PRICE", "MILES", "Contact Dealer for Images"))
+CARD_RE = re.compile(
+    r"(?:Contact Dealer for Images\n)?"
+    r"(?P<year_make_model>(?:19|20)\d\d BMW [^\n]+)\n"
+    r"(?P<trim>[^\n]+)\n"
+    r"DEALER PRICE\nMILES\n"
+    r"\$(?P<price>\d{1,3}(?:,\d{3})*)\n"
+    r"(?P<miles>\d{1,3}(?:,\d{3})*)\n"
+    r"(?P<dealer>[^\n]+?) - (?P<distance>\d+(?:\.\d+)?) mi"
+)
+TRIM_RE = re.compile(r"\b(?:[xse]Drive\d*[a-z]?|M\d{2}[a-z]?)\b")
+
+
+def _to_int(digits):
+    """'49,498' / '49498.00' -> 49498, or None when the text is not a number."""
+    digits = digits.replace(",", "").split(".")[0].strip()
+    return int(digits) if digits.isdigit() else None
+
+
+@dataclass(slots=True)
+class CardRecord:
+    vin: str
+    year_make_model: str = ""
+    trim: str = ""
+    price: Optional[int] = None
+    miles: Optional[int] = None
+    dealer: str = ""
+    distance: Optional[float] = None
+    url: str = ""
+    raw_text: str = ""
+
+    def to_dict(self):
+        """The raw_scrape.json record for this card."""
+        return {
+            "vin": self.vin,
+            "year_make_model": self.year_make_model,
+            "trim": self.trim,
+            "price": self.price if self.price is not None else 999999,
+            "miles": self.miles or 0,
+            "dealer": self.dealer,
+            "distance": self.distance,
+            "url": self.url,
+            "raw_text": self.raw_text,
+            "source": "dom"
+        }
+
+
+def vin_from_url(url):
+    return url.rstrip("/").split("/")[-1] if url else "Unknown"
+
+
+def parse_card(text, url=""):
+    """Parse one card's text into a CardRecord (fields not found stay empty/None)."""
+    match = CARD_RE.fullmatch(text)
+    if match:
+        return CardRecord(
+            vin=vin_from_url(url),
+            year_make_model=match["year_make_model"],
+            trim=match["trim"],
+            price=int(match["price"].replace(",", "")),
+            miles=int(match["miles"].replace(",", "")),
+            dealer=match["dealer"],
+            distance=float(match["distance"]),
+            url=url,
+            raw_text=text,
+        )
+
+    record = CardRecord(vin=vin_from_url(url), url=url, raw_text=text)
+    for line in text.split("\n"):
+        line = line.strip()
+        if not line or line in LABELS:
+            continue
+        first = line[0]
+        if first == "$":
+            if record.price is None:
+                record.price = _to_int(line[1:])
+        elif first.isdigit():
+            if line[4:9] == " BMW " and line[:4].isdigit():
+                if not record.year_make_model:
+                    record.year_make_model = line
+            elif record.miles is None:
+                digits = line[:-2] if line.endswith("mi") else line
+                miles = _to_int(digits)
+                if miles is not None and miles >= 100:
+                    record.miles = miles
+        elif line.endswith(" mi") and " - " in line:
+            if not record.dealer:
+                dealer, _, distance = line.rpartition(" - ")
+                record.dealer = dealer.strip()
+                try:
+                    record.distance = float(distance[:-3].replace(",", ""))
+                except ValueError:
+                    pass
+        elif not record.trim and TRIM_RE.search(line):
+            record.trim = line
+        elif not record.dealer and "BMW" in line:
+            record.dealer = line
+    return record
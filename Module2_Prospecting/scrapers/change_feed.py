@@ -0,0 +1,218 @@
+"""
+Structured output of update_inventory for downstream consumers.
+
+ChangeFeed
+    One JSONL file per run in data/change_feed/<run id>.jsonl, one line per
+    change as it is found:
+
+        {"run": "20261016T061500", "timestamp": ..., "vin": ..., "event": "price_drop", "old": 49498, "new": 47998}
+
+    Events: new, price_drop, price_increase, miles, relisted, removed,
+    linked (a VIN-less listing now shows its VIN; "old" is its synthetic ID)
+    and price_conflict (a VIN seen at different prices in different shards;
+    "new" is {shard: price}). Like the scrape stream, the file ends with a
+    {"_event": "run_complete"} record once the changes are committed to the
+    prospects store; a feed without it belongs to a run that failed.
+
+SightingsIndex
+    data/sightings.jsonl, appended once per run and never rewritten:
+
+        {"date": "2026-10-16", "vins": [...listed that day...], "price_cuts": [...], "links": {synthetic ID: VIN}}
+
+    plus data/sightings_index.json, a per-VIN summary
+    {vin: {"first_seen", "last_seen", "last_price_cut"}} with the log offset
+    it covers, so "how long was this car listed" and "days since the last
+    price cut" are dictionary lookups instead of rescans of every
+    price_history. Loading catches the summary up by replaying the log lines
+    past its offset, so a run appends only its own day; the summary is
+    rewritten once it is SUMMARY_EVERY days behind the log (or missing).
+"""
+
+import json
+import os
+from datetime import date, datetime
+from pathlib import Path
+
+from durable_io import fsync_dir, read_json, write_json_atomic
+
+FEED_DIR = 'change_feed'
+INDEX_NAME = 'sightings_index.json'
+SIGHTINGS_LOG = 'sightings.jsonl'
+SUMMARY_EVERY = 30      # log lines replayed on load before the summary is rewritten
+
+
+class ChangeFeed:
+    """Appends one run's changes to its own JSONL file."""
+
+    def __init__(self, data_dir, run_id=None):
+        feed_dir = Path(data_dir) / FEED_DIR
+        feed_dir.mkdir(parents=True, exist_ok=True)
+        base = run_id or datetime.now().strftime("%Y%m%dT%H%M%S")
+        self.run_id = base
+        attempt = 1
+        while (feed_dir / f"{self.run_id}.jsonl").exists():
+            # Two runs in the same second must not share (or overwrite) a feed
+            attempt += 1
+            self.run_id = f"{base}-{attempt}"
+        self.path = feed_dir / f"{self.run_id}.jsonl"
+        self.count = 0
+        self._file = open(self.path, 'x')
+
+    def emit(self, vin, event, old=None, new=None):
+        record = {"run": self.run_id, "timestamp": datetime.now().isoformat(), "vin": vin, "event": event, "old": old, "new": new}
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+        self.count += 1
+
+    def complete(self):
+        self._file.write(json.dumps({"_event": "run_complete", "run": self.run_id, "changes": self.count}) + '\n')
+        self.close()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+
+def _days_between(start, end):
+    return (date.fromisoformat(end) - date.fromisoformat(start)).days
+
+
+class SightingsIndex:
+    """Append-only per-day sightings plus a per-VIN first/last seen and last price cut summary."""
+
+    def __init__(self, data_dir):
+        self.path = Path(data_dir) / INDEX_NAME
+        self.log_file = Path(data_dir) / SIGHTINGS_LOG
+        self.vehicles = {}
+        self._offset = 0        # end of the last log line applied to `vehicles`
+        self._behind = 0        # log lines the saved summary does not include
+        self._stale = False     # the saved summary must be rewritten (missing or rebuilt)
+        self._days = {}         # days recorded since load, appended to the log by save()
+
+    def exists(self):
+        return self.path.exists() or self.log_file.exists()
+
+    def load(self):
+        self.vehicles = {}
+        self._offset = 0
+        self._behind = 0
+        self._stale = not self.path.exists()
+        self._days = {}
+        if self.path.exists():
+            data = read_json(self.path)
+            self.vehicles = data.get("vehicles", {})
+            self._offset = data.get("log_offset", 0)
+        for line in self._log_lines(self._offset):
+            self._apply(json.loads(line))
+            self._offset += len(line)
+            self._behind += 1
+        return self
+
+    def _log_lines(self, offset=0):
+        if not self.log_file.exists():
+            return
+        with open(self.log_file, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # Torn final line of a crashed run; save() cuts it off
+                    return
+                yield line
+
+    def _day(self, day):
+        return self._days.setdefault(day, {"vins": set(), "price_cuts": set(), "links": {}})
+
+    def _apply(self, record):
+        day = record["date"]
+        for listing_id, vin in record.get("links", {}).items():
+            self._link(listing_id, vin)
+        self._sighted(day, record.get("vins", []))
+        for vin in record.get("price_cuts", []):
+            self._price_cut(vin, day)
+
+    def rebuild(self, prospects):
+        """Seed the index from full prospect records (first run only)."""
+        self.vehicles = {}
+        self._stale = True
+        for vin, car in prospects.items():
+            history = car.get('price_history', [])
+            for day in {car['first_seen'], car['last_seen']}:
+                self.record_sightings(day, [vin])
+            for previous, current in zip(history, history[1:]):
+                if current['price'] < previous['price']:
+                    self.record_price_cut(vin, current['date'])
+        return self
+
+    def record_sightings(self, day, vins):
+        """Record that `vins` were listed on `day` (safe to repeat for the same day)."""
+        self._day(day)["vins"].update(vins)
+        self._sighted(day, vins)
+
+    def _sighted(self, day, vins):
+        for vin in vins:
+            entry = self.vehicles.setdefault(vin, {"first_seen": day, "last_seen": day, "last_price_cut": None})
+            entry['first_seen'] = min(entry['first_seen'], day)
+            entry['last_seen'] = max(entry['last_seen'], day)
+
+    def link(self, listing_id, vin, day=None):
+        """Carry a VIN-less listing's entry over to its real VIN (past days keep the old ID)."""
+        self._day(day or date.today().isoformat())["links"][listing_id] = vin
+        self._link(listing_id, vin)
+
+    def _link(self, listing_id, vin):
+        if listing_id in self.vehicles:
+            self.vehicles[vin] = self.vehicles.pop(listing_id)
+
+    def record_price_cut(self, vin, day):
+        self._day(day)["price_cuts"].add(vin)
+        self._price_cut(vin, day)
+
+    def _price_cut(self, vin, day):
+        entry = self.vehicles.setdefault(vin, {"first_seen": day, "last_seen": day, "last_price_cut": None})
+        entry['last_price_cut'] = max(entry['last_price_cut'] or day, day)
+
+    def days_listed(self, vin):
+        """Calendar days from first to last sighting (1 if only seen once), or None if unknown."""
+        entry = self.vehicles.get(vin)
+        return _days_between(entry['first_seen'], entry['last_seen']) + 1 if entry else None
+
+    def days_since_price_cut(self, vin, today=None):
+        """Days since the VIN's last price cut, or None if it never had one."""
+        entry = self.vehicles.get(vin)
+        if not entry or not entry['last_price_cut']:
+            return None
+        return _days_between(entry['last_price_cut'], today or date.today().isoformat())
+
+    def listed_on(self, day):
+        """VINs listed on `day` (reads the log; not needed for the per-VIN lookups)."""
+        listed = set(self._days.get(day, {}).get("vins", ()))
+        for line in self._log_lines():
+            record = json.loads(line)
+            if record["date"] == day:
+                listed.update(record.get("vins", []))
+        return sorted(listed)
+
+    def save(self):
+        """Append the days recorded since load() to the log; rewrite the summary only when it is stale or behind."""
+        if self._days:
+            created = not self.log_file.exists()
+            with open(self.log_file, 'ab') as f:
+                f.truncate(self._offset)
+                for day in sorted(self._days):
+                    recorded = self._days[day]
+                    line = (json.dumps({"date": day, "vins": sorted(recorded["vins"]),
+                                        "price_cuts": sorted(recorded["price_cuts"]), "links": recorded["links"]}) + '\n').encode()
+                    f.write(line)
+                    self._offset += len(line)
+                f.flush()
+                os.fsync(f.fileno())
+            if created:
+                fsync_dir(self.log_file.parent)
+            self._behind += len(self._days)
+            self._days = {}
+        if self._stale or self._behind >= SUMMARY_EVERY:
+            write_json_atomic(self.path, {"log_offset": self._offset, "vehicles": self.vehicles})
+            self._behind = 0
+            self._stale = False
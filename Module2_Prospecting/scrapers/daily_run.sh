@@ -11,7 +11,7 @@ echo "Date: $(date)"
 echo "==================================="
 echo ""
 
-echo "[1/2] Running BMW CPO Playwright Scraper..."
+echo "[1/4] Running BMW CPO Playwright Scraper..."
 cd "$PROJECT_ROOT" || exit
 "$VENV_PYTHON" "$SCRIPT_DIR/bmw_cpo_scraper.py"
 
@@ -21,7 +21,15 @@ if [ $? -ne 0 ]; then
 fi
 
 echo ""
-echo "[2/2] Running Inventory Database Upsert..."
+echo "[2/4] Enriching New or Changed Vehicles from Detail Pages..."
+"$VENV_PYTHON" "$SCRIPT_DIR/enrich_details.py"
+
+if [ $? -ne 0 ]; then
+    echo "Detail enrichment failed. Continuing without new details."
+fi
+
+echo ""
+echo "[3/4] Running Inventory Database Upsert..."
 "$VENV_PYTHON" "$SCRIPT_DIR/update_inventory.py"
 
 if [ $? -ne 0 ]; then
@@ -30,7 +38,7 @@ if [ $? -ne 0 ]; then
 fi
 
 echo ""
-echo "[3/3] Generating Markdown Value Matrix Report..."
+echo "[4/4] Generating Markdown Value Matrix Report..."
 "$VENV_PYTHON" "$SCRIPT_DIR/../reports/generate_report.py"
 
 if [ $? -ne 0 ]; then
@@ -0,0 +1,135 @@
+"""
+Crash-safe file helpers for the prospects database.
+
+*   `write_json_atomic` writes to a temp file in the same directory, fsyncs
+    it, keeps the previous versions as rotating backups (FILE.1 newest ..
+    FILE.N oldest) and renames the temp file over the target, then fsyncs the
+    directory. A process killed at any point leaves either the old file or
+    the new one, never a truncated mix.
+*   `read_json` falls back to the newest readable backup when the file is
+    corrupt, instead of silently starting from an empty database.
+*   `StoreLock` is an advisory flock on a lock file: exclusive for writers
+    (update_inventory, migrations), shared for readers (reports, detail
+    enrichment), so concurrent runs never see or produce a half-applied
+    update. Where fcntl is unavailable (Windows) it is a no-op.
+"""
+
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+DEFAULT_BACKUPS = 3
+
+
+def backup_path(path, n):
+    return path.with_name(f"{path.name}.{n}")
+
+
+def fsync_dir(path):
+    """Make a rename or file creation in `path` durable."""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def rotate_backups(path, backups):
+    """FILE.(N-1) -> FILE.N, ..., FILE -> FILE.1 (FILE itself stays in place)."""
+    if backups <= 0 or not path.exists():
+        return
+    for n in range(backups - 1, 0, -1):
+        if backup_path(path, n).exists():
+            os.replace(backup_path(path, n), backup_path(path, n + 1))
+    newest = backup_path(path, 1)
+    try:
+        # A hard link shares the old file's data, so no copy is needed
+        os.link(path, newest)
+    except OSError:
+        shutil.copy2(path, newest)
+
+
+def write_json_atomic(path, data, indent=None, backups=DEFAULT_BACKUPS):
+    """Durably replace `path` with `data` as JSON, keeping `backups` old versions."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, 'w') as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        rotate_backups(path, backups)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    fsync_dir(path.parent)
+
+
+def read_json(path, backups=DEFAULT_BACKUPS):
+    """
+    Parsed JSON from `path`, or from its newest readable backup if `path` is
+    corrupt. Raises ValueError when neither the file nor any backup parses.
+    """
+    path = Path(path)
+    candidates = [path] + [backup_path(path, n) for n in range(1, backups + 1)]
+    for candidate in candidates:
+        if not candidate.exists():
+            continue
+        try:
+            with open(candidate, 'r') as f:
+                data = json.load(f)
+        except ValueError:
+            print(f"Warning: {candidate.name} is corrupt, trying an older backup.")
+            continue
+        if candidate != path:
+            print(f"Warning: recovered {path.name} from backup {candidate.name}.")
+        return data
+    raise ValueError(f"{path} and its backups are all unreadable; refusing to start from an empty database.")
+
+
+class StoreLock:
+    """Advisory lock on a file; exclusive for writers, shared for readers."""
+
+    def __init__(self, path, exclusive=True):
+        self.path = Path(path)
+        self.exclusive = exclusive
+        self._file = None
+
+    def acquire(self):
+        if fcntl is None or self._file is not None:
+            return self
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a')
+        mode = fcntl.LOCK_EX if self.exclusive else fcntl.LOCK_SH
+        try:
+            fcntl.flock(self._file, mode | fcntl.LOCK_NB)
+        except BlockingIOError:
+            print(f"Waiting for {'exclusive' if self.exclusive else 'shared'} lock on {self.path.name}...")
+            start = time.monotonic()
+            fcntl.flock(self._file, mode)
+            print(f"Lock acquired after {time.monotonic() - start:.1f}s")
+        return self
+
+    def release(self):
+        if self._file is not None:
+            if fcntl is not None:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
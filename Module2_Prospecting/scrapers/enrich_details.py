@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Incremental detail enrichment for scraped vehicles.
+
+The search results only carry price, miles, trim and dealer. Each vehicle's
+`/detail/<VIN>` page adds the configuration BMWConfigAnalyzer needs (colors,
+upholstery, wheels, suspension, packages) plus the option list and CARFAX
+link. Fetching every page daily would be slow, so this stage only fetches:
+
+*   VINs not yet in the prospects database,
+*   VINs whose price or miles changed since they were last seen,
+*   VINs with no stored details yet, or whose stored details came out empty
+    (a page that failed to render or did not parse).
+
+Detail pages are rendered client-side, so a plain HTTP GET only returns the
+empty application shell. Each page is rendered in a headless browser (a
+bounded pool of contexts, with the scraper's resource filter) under a rate
+limit, and the rendered HTML is cached on disk in data/detail_cache/. A
+cached page younger than the TTL is reused without rendering again. A page
+that renders but yields no details is not cached, so it is retried on the
+next run rather than served empty for a week.
+
+Extracted details are written atomically to data/vehicle_details.json, keyed
+by VIN, with the same field names as BMWConfigAnalyzer's configurations.
+
+`--record DIR` also saves each rendered page to DIR/details.jsonl (see
+scrape_archive.py); `--replay DIR` runs the extractors over those pages
+offline and writes what they found to DIR/replay_details.json.
+
+Usage:
+    python3 Module2_Prospecting/scrapers/enrich_details.py --concurrency 4 --rate 2
+    python3 Module2_Prospecting/scrapers/enrich_details.py --replay scrape_archive/2026-10-16
+"""
+
+import argparse
+import asyncio
+import html as html_lib
+import json
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+
+from bmw_cpo_scraper import CONTEXT_OPTIONS, wait_for_ready
+from durable_io import read_json, write_json_atomic
+from listing_identity import has_vin
+from prospects_store import open_store
+from resource_filter import ResourceFilter
+from scrape_archive import DetailArchive, load_details
+from scrape_stream import StreamReader
+
+project_root = Path(__file__).resolve().parent.parent.parent
+data_dir = project_root / 'Module2_Prospecting' / 'data'
+stream_file = data_dir / 'raw_scrape.jsonl'
+raw_file = data_dir / 'raw_scrape.json'
+details_file = data_dir / 'vehicle_details.json'
+cache_dir = data_dir / 'detail_cache'
+
+DETAIL_URL = "https://www.bmwusa.com/certified-preowned-search/detail/{vin}"
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RATE = 2.0          # requests started per second
+DEFAULT_TTL_HOURS = 24 * 7  # reuse a cached page without rendering it again for a week
+RENDER_TIMEOUT_MS = 10000
+# Any of these visible means the vehicle's specs have rendered into the page
+DETAIL_READY_SELECTORS = ("text=Exterior", "text=Interior", "text=Upholstery")
+REPLAY_OUTPUT = 'replay_details.json'   # written inside the archive directory by --replay
+
+TAG_RE = re.compile(r"<[^>]+>")
+SCRIPT_RE = re.compile(r"<(script|style)\b[^>]*>.*?</\1>", re.S | re.I)
+CARFAX_RE = re.compile(r"""href=["']([^"']*carfax[^"']*)["']""", re.I)
+LABELLED_RE = {
+    "exterior_color": re.compile(r"Exterior(?: Color)?\s*[:\n]\s*([^\n]+)", re.I),
+    "interior": re.compile(r"(?:Interior|Upholstery)(?: Color)?\s*[:\n]\s*([^\n]+)", re.I),
+    "wheels": re.compile(r"([^\n]*\b(?:19|20|21|22|23)[\"”]?(?:-inch| inch|\")[^\n]*wheels?[^\n]*)", re.I),
+}
+MATERIALS = ("Perforated SensaTec", "SensaTec", "SensaFin", "Merino Leather", "Vernasca Leather", "Leather", "Microfiber", "Cloth")
+
+
+def html_to_text(page_html):
+    """Visible text of a detail page, one block per line."""
+    text = SCRIPT_RE.sub(" ", page_html)
+    text = re.sub(r"<(?:br|/p|/div|/li|/h\d|/tr|/dt|/dd|/span)\b[^>]*>", "\n", text, flags=re.I)
+    text = html_lib.unescape(TAG_RE.sub(" ", text))
+    lines = (re.sub(r"[ \t]+", " ", line).strip() for line in text.split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def extract_details(page_html):
+    """Configuration fields from a detail page's HTML (fields not found are omitted)."""
+    text = html_to_text(page_html)
+    details = {}
+
+    match = LABELLED_RE["exterior_color"].search(text)
+    if match:
+        details["exterior_color"] = match.group(1).strip()
+
+    match = LABELLED_RE["interior"].search(text)
+    if match:
+        interior = match.group(1).strip()
+        material = next((m for m in MATERIALS if m.lower() in interior.lower()), "")
+        details["interior_material"] = material
+        details["interior_color"] = interior.replace(material, "").strip(" ,/-") if material else interior
+
+    match = LABELLED_RE["wheels"].search(text)
+    if match:
+        details["wheels"] = match.group(1).strip()
+
+    lines = text.split("\n")
+    details["packages"] = sorted({line for line in lines if re.search(r"\bPackage\b|\bPkg\b", line) and len(line) < 80})
+    # Option codes are shown as "Description (05AU)"
+    details["options"] = sorted({line for line in lines if re.search(r"\(\w{3,4}\)$", line) and len(line) < 80})
+    # Absence of "air suspension" on the page does not prove coil springs
+    if any("air suspension" in line.lower() for line in lines):
+        details["suspension"] = "Air Suspension"
+
+    match = CARFAX_RE.search(page_html)
+    if match:
+        details["carfax_url"] = html_lib.unescape(match.group(1))
+    return details
+
+
+def has_details(entry):
+    """Whether a stored details entry holds anything extracted from the page."""
+    return any(value for key, value in (entry or {}).items() if key != "enriched")
+
+
+def select_vins(scraped, prospects, details):
+    """VINs worth fetching today: new, price/miles changed, or not (successfully) enriched."""
+    selected = []
+    for car in scraped:
+        vin = car.get("vin", "Unknown")
+        if not has_vin(vin):
+            continue
+        known = prospects.get(vin)
+        changed = known is None or known.get("price") != car.get("price") or known.get("miles") != car.get("miles")
+        if changed or not has_details(details.get(vin)):
+            selected.append(vin)
+    return selected
+
+
+class RateLimiter:
+    """Spaces request starts at least 1/rate seconds apart."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.next_start = 0.0
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self.lock:
+            now = time.monotonic()
+            delay = self.next_start - now
+            self.next_start = max(now, self.next_start) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class DetailCache:
+    """One JSON (metadata) + one HTML file per VIN under `path`."""
+
+    def __init__(self, path, ttl_hours=DEFAULT_TTL_HOURS):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl_hours * 3600
+
+    def load(self, vin):
+        meta_file = self.path / f"{vin}.json"
+        html_file = self.path / f"{vin}.html"
+        if not meta_file.exists() or not html_file.exists():
+            return None, None
+        with open(meta_file, 'r') as f:
+            meta = json.load(f)
+        with open(html_file, 'r') as f:
+            return meta, f.read()
+
+    def is_fresh(self, meta):
+        return meta is not None and time.time() - meta.get("fetched_at", 0) < self.ttl
+
+    def save(self, vin, meta, page_html=None):
+        if page_html is not None:
+            with open(self.path / f"{vin}.html", 'w') as f:
+                f.write(page_html)
+        with open(self.path / f"{vin}.json", 'w') as f:
+            json.dump(meta, f, indent=2)
+
+
+async def render_page(context, url):
+    """Rendered HTML of a detail page, once its specs are visible (or the wait runs out)."""
+    page = await context.new_page()
+    try:
+        response = await page.goto(url, wait_until="domcontentloaded", timeout=RENDER_TIMEOUT_MS * 3)
+        if response is not None and not response.ok:
+            raise RuntimeError(f"HTTP {response.status}")
+        await wait_for_ready(page, RENDER_TIMEOUT_MS, DETAIL_READY_SELECTORS, network_idle=True)
+        return await page.content()
+    finally:
+        await page.close()
+
+
+async def fetch_details(vins, cache, concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE, resource_filter=None, archive=None):
+    """
+    Details for each VIN, using the cache where possible. Returns
+    ({vin: details}, stats) where stats counts cached / fetched / empty / failed.
+    """
+    from playwright.async_api import async_playwright
+
+    stats = {"cached": 0, "fetched": 0, "empty": 0, "failed": 0}
+    results = {}
+    pool = asyncio.Queue()
+    limiter = RateLimiter(rate)
+
+    async def enrich(vin):
+        meta, page_html = cache.load(vin)
+        if cache.is_fresh(meta):
+            details = extract_details(page_html)
+            # An empty page in the cache (e.g. an unrendered shell) is rendered again
+            if has_details(details):
+                stats["cached"] += 1
+                results[vin] = details
+                return
+
+        url = DETAIL_URL.format(vin=vin)
+        context = await pool.get()
+        try:
+            await limiter.wait()
+            page_html = await render_page(context, url)
+        except Exception as e:
+            stats["failed"] += 1
+            print(f"[DETAIL] {vin} failed: {e}")
+            return
+        finally:
+            pool.put_nowait(context)
+
+        if archive:
+            archive.record_page(vin, url, page_html)
+        details = extract_details(page_html)
+        if has_details(details):
+            stats["fetched"] += 1
+            cache.save(vin, {"url": url, "fetched_at": time.time()}, page_html)
+        else:
+            stats["empty"] += 1
+            print(f"[DETAIL] {vin}: no details found on the rendered page")
+        results[vin] = details
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        try:
+            options = CONTEXT_OPTIONS
+            if resource_filter:
+                # Service workers fetch outside the context's routes, so they would bypass the filter
+                options = {**CONTEXT_OPTIONS, "service_workers": "block"}
+            for _ in range(max(1, min(concurrency, len(vins)))):
+                context = await browser.new_context(**options)
+                if resource_filter:
+                    await resource_filter.attach(context)
+                pool.put_nowait(context)
+            await asyncio.gather(*(enrich(vin) for vin in vins))
+        finally:
+            await browser.close()
+    return results, stats
+
+
+def replay_details(archive_dir):
+    """Run the extractors over recorded detail pages, offline -> {vin: details}."""
+    pages = load_details(archive_dir)
+    results = {vin: extract_details(page["html"]) for vin, page in pages.items()}
+    for vin, details in results.items():
+        filled = sorted(key for key, value in details.items() if value)
+        print(f"[REPLAY] {vin}: {', '.join(filled) if filled else 'no details'}")
+    output = Path(archive_dir) / REPLAY_OUTPUT
+    write_json_atomic(output, results, indent=2)
+    print(f"Replayed {len(pages)} detail pages from {archive_dir}; "
+          f"{sum(1 for details in results.values() if has_details(details))} with details. Saved to {output}")
+    return results
+
+
+def enrich_details(concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE, ttl_hours=DEFAULT_TTL_HOURS,
+                   resource_filter=None, record_dir=None):
+    reader = StreamReader(stream_file, legacy_path=raw_file)
+    if not reader.exists():
+        print(f"Error: {stream_file} not found. Run scraper first.")
+        return
+    scraped = list(reader)
+    store = open_store(data_dir)
+    prospects = store.lookup({car.get("vin", "Unknown") for car in scraped})
+    store.close()
+    details = read_json(details_file) if details_file.exists() else {}
+
+    vins = select_vins(scraped, prospects, details)
+    print(f"Enriching {len(vins)} of {len(scraped)} scraped vehicles (new, changed or not yet enriched)...")
+    if not vins:
+        return
+
+    start = time.perf_counter()
+    archive = DetailArchive(record_dir) if record_dir else None
+    try:
+        results, stats = asyncio.run(fetch_details(vins, DetailCache(cache_dir, ttl_hours), concurrency, rate,
+                                                   resource_filter, archive))
+    finally:
+        if archive:
+            archive.close()
+    today = datetime.now().strftime("%Y-%m-%d")
+    for vin, vehicle_details in results.items():
+        details[vin] = {**vehicle_details, "enriched": today}
+
+    write_json_atomic(details_file, details, indent=2)
+    print(f"Details: {stats['fetched']} rendered, {stats['cached']} from cache, {stats['empty']} empty, "
+          f"{stats['failed']} failed in {time.perf_counter() - start:.1f}s")
+    print(f"Saved to {details_file.name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch detail pages for new or changed VINs.")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Maximum detail pages (browser contexts) rendering at once")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Maximum detail pages started per second")
+    parser.add_argument("--ttl-hours", type=float, default=DEFAULT_TTL_HOURS, help="Reuse cached pages younger than this without rendering them again")
+    parser.add_argument("--no-block", action="store_true", help="Load every resource (images, fonts, trackers) instead of filtering them")
+    parser.add_argument("--record", type=str, default=None, help="Save the rendered detail pages from this run to an archive directory")
+    parser.add_argument("--replay", type=str, default=None, help="Run the extractors offline over detail pages recorded in an archive directory")
+    args = parser.parse_args()
+
+    if args.replay:
+        replay_details(args.replay)
+    else:
+        enrich_details(args.concurrency, args.rate, args.ttl_hours,
+                       None if args.no_block else ResourceFilter(), args.record)
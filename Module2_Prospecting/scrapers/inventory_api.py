@@ -0,0 +1,243 @@
+"""
+Inventory API harvesting for the BMW CPO scraper.
+
+The search SPA loads its results from an `inventoryservices` / `graphql`
+endpoint. InventoryCapture sniffs those responses on a page, normalizes the
+vehicles into the same record shape the DOM card parser produces, and then
+replays the captured request for every remaining result page, so the whole
+search comes from JSON without touching the DOM.
+"""
+
+import asyncio
+import json
+import math
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from listing_identity import dedup_key
+
+API_PATTERNS = ("inventoryservices", "graphql")
+TRACE_PATTERNS = ("json", "api", "graphql", "vehicle", "inventory")
+
+# Names the API may use for paging and result counts
+PAGE_KEYS = ("page", "pageNumber", "pageIndex", "currentPage")
+OFFSET_KEYS = ("offset", "start", "from", "skip")
+SIZE_KEYS = ("pageSize", "size", "limit", "rows")
+TOTAL_KEYS = ("totalCount", "total", "totalResults", "totalRecords", "numFound")
+
+
+def is_inventory_url(url):
+    return any(pattern in url for pattern in API_PATTERNS)
+
+
+def extract_results(data):
+    """
+    Vehicle list and paging metadata from one API payload -> (vehicles, meta).
+    BMW API usually returns { "results": [...] } or similar; a bare list is accepted too.
+    """
+    if isinstance(data, list):
+        return data, {}
+    if not isinstance(data, dict):
+        return [], {}
+    container = data
+    if "data" in data and isinstance(data["data"], dict) and "results" in data["data"]:
+        container = data["data"]
+    vehicles = container.get("results", container.get("vehicles", []))
+    if not isinstance(vehicles, list):
+        vehicles = []
+
+    meta = {}
+    for source in (data, container, data.get("pagination", {}), data.get("paging", {}), container.get("pagination", {})):
+        if not isinstance(source, dict):
+            continue
+        for key in TOTAL_KEYS:
+            if isinstance(source.get(key), int):
+                meta.setdefault("total", source[key])
+        for key in SIZE_KEYS:
+            if isinstance(source.get(key), int):
+                meta.setdefault("page_size", source[key])
+    return vehicles, meta
+
+
+def _parse_price(value):
+    if isinstance(value, dict):
+        value = value.get("value", value.get("amount"))
+    if isinstance(value, str):
+        digits = value.replace("$", "").replace(",", "").split(".")[0].strip()
+        return int(digits) if digits.isdigit() else None
+    if isinstance(value, (int, float)):
+        return int(value)
+    return None
+
+
+def normalize_api_vehicle(vehicle, source="api"):
+    """API vehicle dict -> the record shape written to raw_scrape.json."""
+    vin = vehicle.get("vin", "Unknown")
+    price = _parse_price(vehicle.get("price", vehicle.get("internetPrice", vehicle.get("sellingPrice"))))
+    miles = vehicle.get("mileage", vehicle.get("odometer", vehicle.get("miles", 0)))
+    if isinstance(miles, str):
+        miles = int(miles.replace(",", "")) if miles.replace(",", "").isdigit() else 0
+
+    dealer = vehicle.get("dealerName", vehicle.get("dealer", ""))
+    if isinstance(dealer, dict):
+        dealer = dealer.get("name", "")
+
+    year_make_model = vehicle.get("yearMakeModel") or " ".join(
+        str(part) for part in (vehicle.get("year"), vehicle.get("make", "BMW"), vehicle.get("series", vehicle.get("model"))) if part
+    )
+    return {
+        "vin": vin,
+        "year_make_model": year_make_model,
+        "trim": vehicle.get("trim", vehicle.get("modelName", "")),
+        "price": price if price is not None else 999999,
+        "miles": miles or 0,
+        "dealer": dealer,
+        "url": f"https://www.bmwusa.com/certified-preowned-search/detail/{vin}" if vin != "Unknown" else "",
+        "raw_text": "",
+        "source": source
+    }
+
+
+def _is_cpo(vehicle):
+    # cpo could be boolean or string
+    cpo_status = vehicle.get("certified", vehicle.get("cpo", False))
+    return str(cpo_status).lower() in ["true", "1", "yes"]
+
+
+def page_requests(url, post_data, first_count, meta):
+    """
+    (url, post_data) for every result page after the first, by rewriting
+    whichever page/offset parameter the captured request uses (query string
+    first, then a JSON body or its GraphQL `variables`). Returns [] when the
+    payload has no total or the request has no recognisable paging parameter.
+    """
+    total = meta.get("total")
+    page_size = meta.get("page_size") or first_count
+    if not total or not page_size or total <= first_count:
+        return []
+    pages = math.ceil(total / page_size)
+
+    def rewrite(params, page):
+        for key in PAGE_KEYS:
+            if key in params:
+                params[key] = int(params[key]) + page
+                return True
+        for key in OFFSET_KEYS:
+            if key in params:
+                params[key] = int(params[key]) + page * page_size
+                return True
+        return False
+
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    if any(key in query for key in PAGE_KEYS + OFFSET_KEYS):
+        requests = []
+        for page in range(1, pages):
+            params = dict(query)
+            rewrite(params, page)
+            requests.append((urlunsplit(parts._replace(query=urlencode(params))), post_data))
+        return requests
+
+    try:
+        body = json.loads(post_data) if post_data else None
+    except ValueError:
+        body = None
+    if isinstance(body, dict):
+        target_path = "variables" if isinstance(body.get("variables"), dict) else None
+        target = body["variables"] if target_path else body
+        if any(key in target for key in PAGE_KEYS + OFFSET_KEYS):
+            requests = []
+            for page in range(1, pages):
+                new_body = json.loads(post_data)
+                rewrite(new_body["variables"] if target_path else new_body, page)
+                requests.append((url, json.dumps(new_body)))
+            return requests
+    return []
+
+
+class InventoryCapture:
+    """Collects inventory API payloads seen by one page and pages through the rest."""
+
+    def __init__(self, max_price, label="", archive=None, verbose=True, on_vehicle=None, key=None):
+        self.max_price = max_price
+        self.label = label
+        self.key = key or label  # identifies the query in a recorded archive
+        self.archive = archive  # ScrapeArchive when recording
+        self.on_vehicle = on_vehicle  # called with each accepted record (e.g. ScrapeStream.write)
+        self.verbose = verbose
+        self.vehicles = []
+        self.seen_vins = set()
+        self.seen = asyncio.Event()  # set once a payload with vehicles has arrived
+        self.first_request = None
+        self.first_count = 0
+        self.meta = {}
+        self.failed_pages = 0  # result pages that could not be fetched
+
+    def add_payload(self, data, url=""):
+        vehicles, meta = extract_results(data)
+        if not vehicles:
+            return 0
+        if self.verbose:
+            print(f"[{self.label}] Captured {len(vehicles)} vehicles in this payload from {url}")
+        self.meta = self.meta or meta
+        for vehicle in vehicles:
+            if not isinstance(vehicle, dict):
+                continue
+            record = normalize_api_vehicle(vehicle)
+            # Get VIN to avoid duplicates from multiple API calls
+            key = dedup_key(record)
+            if key in self.seen_vins:
+                continue
+            if record["price"] <= self.max_price and _is_cpo(vehicle):
+                self.vehicles.append(record)
+                self.seen_vins.add(key)
+                if self.on_vehicle:
+                    self.on_vehicle(record)
+        self.seen.set()
+        return len(vehicles)
+
+    async def handle_response(self, response):
+        url = response.url
+        # Print a trace of JSON endpoints for discovery
+        if any(pattern in url for pattern in TRACE_PATTERNS):
+            print(f"API Trace: {url}")
+        if not is_inventory_url(url):
+            return
+        try:
+            data = await response.json()
+        except Exception:
+            # We silently ignore non-json responses or parsing errors for unrelated URLs
+            return
+        request = response.request
+        if self.archive:
+            self.archive.record_response(self.label, self.key, url, request.method, request.post_data, data)
+        count = self.add_payload(data, url)
+        if count and self.first_request is None:
+            self.first_request = (url, request.method, request.headers, request.post_data)
+            self.first_count = count
+
+    async def fetch_remaining_pages(self, request_context):
+        """
+        Replay the first inventory request for every further page, concurrently.
+        Pages that fail are counted in `failed_pages` rather than retried.
+        """
+        if self.first_request is None:
+            return 0
+        url, method, headers, post_data = self.first_request
+        pending = page_requests(url, post_data, self.first_count, self.meta)
+        if not pending and self.meta.get("total", 0) > self.first_count:
+            print(f"[{self.label}] API reports {self.meta['total']} results but no paging parameter was recognised.")
+            return 0
+
+        async def fetch(page_url, page_data):
+            try:
+                response = await request_context.fetch(page_url, method=method, headers=headers, data=page_data)
+                data = await response.json()
+                if self.archive:
+                    self.archive.record_response(self.label, self.key, page_url, method, page_data, data)
+                self.add_payload(data, page_url)
+            except Exception as e:
+                print(f"[{self.label}] Page fetch failed for {page_url}: {e}")
+                self.failed_pages += 1
+
+        await asyncio.gather(*(fetch(page_url, page_data) for page_url, page_data in pending))
+        return len(pending)
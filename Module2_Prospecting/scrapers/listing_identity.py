@@ -0,0 +1,176 @@
+"""
+Stable identities for listings that show no VIN.
+
+Some cards have no detail link, so the scraper can only record them as
+vin "Unknown". Stored under that one key, every VIN-less car would collide
+into a single record whose price_history flips between unrelated cars.
+Instead, update_inventory gives each VIN-less listing a synthetic ID
+("NOVIN-<hash>") and recognises it on later days by its fingerprint:
+
+*   same dealer and trim,
+*   mileage no lower and at most MILES_WINDOW higher than last time,
+*   price within PRICE_TOLERANCE of last time.
+
+The closest candidate wins, and each stored listing can be claimed by only
+one card per run. When a card with a real VIN matches a VIN-less listing
+whose VIN was never tracked, the listing is linked to that VIN and keeps its
+history. A listing stored before this existed, still under a placeholder VIN
+("Unknown" or empty), is first given a synthetic ID of its own
+(placeholder_ids) so it is matched like any other VIN-less listing.
+
+Stored listings are held in an in-memory index keyed by
+(dealer, trim, miles bucket), so matching a card only looks at three
+buckets, whatever the size of the inventory.
+"""
+
+import hashlib
+from collections import defaultdict
+
+NO_VIN = "Unknown"
+SYNTHETIC_PREFIX = "NOVIN-"
+MILES_WINDOW = 1500         # miles a listing may gain between sightings
+MILES_SLACK = 50            # odometer re-reads can come back slightly lower
+PRICE_TOLERANCE = 0.10      # relative price change still treated as the same listing
+
+
+def has_vin(vin):
+    """True for a real VIN (not missing, "Unknown" or synthetic)."""
+    return bool(vin) and vin != NO_VIN and not vin.startswith(SYNTHETIC_PREFIX)
+
+
+def is_synthetic(vin):
+    return bool(vin) and vin.startswith(SYNTHETIC_PREFIX)
+
+
+def is_placeholder(vin):
+    """A stored key that stands for "no VIN" rather than identifying a listing."""
+    return not has_vin(vin) and not is_synthetic(vin)
+
+
+def dedup_key(vehicle):
+    """Key for dropping repeats of a card: its VIN, or its visible fields when it has none."""
+    vin = vehicle.get("vin", NO_VIN)
+    if has_vin(vin) or is_synthetic(vin):
+        return vin
+    return f"{NO_VIN}:{vehicle.get('dealer', '')}|{vehicle.get('trim', '')}|{vehicle.get('miles', 0)}|{vehicle.get('price', 0)}"
+
+
+def synthetic_id(vehicle):
+    """Deterministic ID for a VIN-less listing, from the fields it was first seen with."""
+    digest = hashlib.sha1(dedup_key(vehicle).encode()).hexdigest()[:12].upper()
+    return f"{SYNTHETIC_PREFIX}{digest}"
+
+
+def placeholder_ids(vehicles, taken=()):
+    """
+    {placeholder VIN: synthetic ID} for stored listings still keyed by a
+    placeholder, so they can be re-keyed once and then matched like any other
+    VIN-less listing. IDs already in `taken` are never handed out.
+    """
+    taken = set(taken)
+    ids = {}
+    for car in vehicles:
+        vin = car.get('vin')
+        if not is_placeholder(vin):
+            continue
+        base = listing_id = synthetic_id(car)
+        n = 1
+        while listing_id in taken:
+            n += 1
+            listing_id = f"{base}-{n}"
+        taken.add(listing_id)
+        ids[vin] = listing_id
+    return ids
+
+
+class IdentityIndex:
+    """VIN-less listings bucketed by (dealer, trim, miles // MILES_WINDOW)."""
+
+    def __init__(self, miles_window=MILES_WINDOW, price_tolerance=PRICE_TOLERANCE):
+        self.miles_window = miles_window
+        self.price_tolerance = price_tolerance
+        self.buckets = defaultdict(dict)    # bucket -> {listing id: (miles, price)}
+        self.bucket_of = {}                 # listing id -> bucket
+
+    def _bucket(self, vehicle, offset=0):
+        return (vehicle.get('dealer', '').strip().lower(), vehicle.get('trim', '').strip().lower(),
+                (vehicle.get('miles') or 0) // self.miles_window + offset)
+
+    def add(self, listing_id, vehicle):
+        bucket = self._bucket(vehicle)
+        self.buckets[bucket][listing_id] = (vehicle.get('miles') or 0, vehicle.get('price') or 0)
+        self.bucket_of[listing_id] = bucket
+
+    def remove(self, listing_id):
+        bucket = self.bucket_of.pop(listing_id, None)
+        if bucket is not None:
+            del self.buckets[bucket][listing_id]
+
+    def match(self, vehicle):
+        """ID of the closest stored listing this card could be, or None."""
+        miles = vehicle.get('miles') or 0
+        price = vehicle.get('price') or 0
+        best, best_score = None, None
+        # A listing that gained up to one window of miles sits in this bucket or the one below
+        for offset in (-1, 0, 1):
+            for listing_id, (known_miles, known_price) in self.buckets.get(self._bucket(vehicle, offset), {}).items():
+                gained = miles - known_miles
+                if not -MILES_SLACK <= gained <= self.miles_window:
+                    continue
+                if known_price and abs(price - known_price) > self.price_tolerance * known_price:
+                    continue
+                score = (abs(gained), abs(price - known_price))
+                if best_score is None or score < best_score:
+                    best, best_score = listing_id, score
+        return best
+
+    def claim(self, vehicle):
+        """match() and take the listing out of the index so no other card can claim it."""
+        listing_id = self.match(vehicle)
+        if listing_id is not None:
+            self.remove(listing_id)
+        return listing_id
+
+
+def resolve_identities(scraped, vinless, known_vins):
+    """
+    Give every VIN-less card in `scraped` a stable ID (in place) and find
+    stored VIN-less listings that now appear with a real VIN.
+
+    `vinless` maps the synthetic IDs of active stored listings to their
+    records; `known_vins` holds the real VINs already tracked. Returns
+    ({real VIN: synthetic ID} links, number of VIN-less cards matched,
+    number of new IDs minted).
+    """
+    index = IdentityIndex()
+    for listing_id, car in vinless.items():
+        index.add(listing_id, car)
+
+    matched = minted = 0
+    assigned = set()
+    for car in scraped:
+        if has_vin(car.get('vin')):
+            continue
+        listing_id = index.claim(car)
+        if listing_id is not None:
+            matched += 1
+        else:
+            # Two identical VIN-less cards in one scrape are still two listings,
+            # and a new listing must not take the ID of a stored one it did not match
+            base = listing_id = synthetic_id(car)
+            n = 1
+            while listing_id in assigned or listing_id in vinless:
+                n += 1
+                listing_id = f"{base}-{n}"
+            minted += 1
+        assigned.add(listing_id)
+        car['vin'] = listing_id
+
+    links = {}
+    for car in scraped:
+        vin = car.get('vin')
+        if has_vin(vin) and vin not in known_vins and vin not in links:
+            listing_id = index.claim(car)
+            if listing_id is not None:
+                links[vin] = listing_id
+    return links, matched, minted
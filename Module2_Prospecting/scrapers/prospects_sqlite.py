@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+SQLite backend for the prospects database (data/prospects.db).
+
+Stores the same state as the JSON event log, normalized into three tables:
+
+    vehicles            one row per VIN with its current fields and status
+    price_observations  (vin, date, price), one row per day the price changed
+    sightings           (vin, date), one row per day the VIN was in the scrape
+
+with indexes on status, dealer and date (VIN is the primary key). The
+events update_inventory records are applied in bulk, in a single
+transaction per run, and readers query only what they need (for example
+the report selects just the active rows) instead of loading every record.
+
+prospects_db.json can still be exported as a materialized view, but only on
+request (update_inventory --compact or --export-view): the export loads every
+record, which a daily run otherwise never does.
+
+Usage:
+    python3 Module2_Prospecting/scrapers/prospects_sqlite.py --migrate
+"""
+
+import argparse
+import sqlite3
+from collections import defaultdict
+from pathlib import Path
+
+from durable_io import DEFAULT_BACKUPS, StoreLock, write_json_atomic
+from prospects_store import COMPACT_EVERY, DB_NAME, LOCK_NAME, VIEW, ProspectsStore, build_view
+
+COLUMNS = ("vin", "year_make_model", "trim", "price", "original_price", "miles", "dealer", "distance",
+           "url", "raw_text", "source", "status", "first_seen", "last_seen")
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS vehicles (
+    vin TEXT PRIMARY KEY,
+    year_make_model TEXT,
+    trim TEXT,
+    price INTEGER,
+    original_price INTEGER,
+    miles INTEGER,
+    dealer TEXT,
+    distance REAL,
+    url TEXT,
+    raw_text TEXT,
+    source TEXT,
+    status TEXT NOT NULL DEFAULT 'active',
+    first_seen TEXT,
+    last_seen TEXT
+);
+CREATE TABLE IF NOT EXISTS price_observations (
+    vin TEXT NOT NULL,
+    date TEXT NOT NULL,
+    price INTEGER NOT NULL,
+    PRIMARY KEY (vin, date)
+);
+CREATE TABLE IF NOT EXISTS sightings (
+    vin TEXT NOT NULL,
+    date TEXT NOT NULL,
+    PRIMARY KEY (vin, date)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_vehicles_status ON vehicles(status);
+CREATE INDEX IF NOT EXISTS idx_vehicles_dealer ON vehicles(dealer);
+CREATE INDEX IF NOT EXISTS idx_price_observations_date ON price_observations(date);
+CREATE INDEX IF NOT EXISTS idx_sightings_date ON sightings(date);
+"""
+MAX_VARIABLES = 500     # VINs per IN (...) query, well under SQLite's limit
+UPDATABLE = frozenset(("year_make_model", "trim", "dealer", "distance", "url", "raw_text", "source"))
+
+
+def _row_to_car(row):
+    # Columns the record never had come back as NULL; leave them out like the JSON does
+    return {key: row[key] for key in row.keys() if row[key] is not None}
+
+
+class SqliteStore:
+    """Same interface as ProspectsStore, backed by an SQLite database."""
+
+    def __init__(self, path, view_file=None, compact_every=COMPACT_EVERY, backups=DEFAULT_BACKUPS, lock=None):
+        self.path = Path(path)
+        self.view_file = Path(view_file) if view_file else self.path.with_name(VIEW)
+        self.compact_every = compact_every
+        self.backups = backups
+        self.lock = lock
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self._queued = []
+
+    @property
+    def pending(self):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'pending_events'").fetchone()
+        return int(row[0]) if row else 0
+
+    def load(self):
+        """Every prospect with its price_history, in the prospects_db.json shape."""
+        history = defaultdict(list)
+        for row in self.conn.execute("SELECT vin, date, price FROM price_observations ORDER BY vin, date"):
+            history[row['vin']].append({"date": row['date'], "price": row['price']})
+        prospects = {}
+        for row in self.conn.execute("SELECT * FROM vehicles ORDER BY rowid"):
+            car = _row_to_car(row)
+            car['price_history'] = history.get(car['vin'], [])
+            prospects[car['vin']] = car
+        return prospects
+
+    def lookup(self, vins):
+        vins = list(vins)
+        found = {}
+        for start in range(0, len(vins), MAX_VARIABLES):
+            chunk = vins[start:start + MAX_VARIABLES]
+            query = f"SELECT * FROM vehicles WHERE vin IN ({','.join('?' * len(chunk))})"
+            for row in self.conn.execute(query, chunk):
+                found[row['vin']] = _row_to_car(row)
+        return found
+
+    def active_vins(self):
+        return dict(self.conn.execute("SELECT vin, last_seen FROM vehicles WHERE status = 'active'").fetchall())
+
+    def active_vehicles(self):
+        return [_row_to_car(row) for row in self.conn.execute("SELECT * FROM vehicles WHERE status = 'active'")]
+
+    def stats(self):
+        counts = dict(self.conn.execute("SELECT status, COUNT(*) FROM vehicles GROUP BY status").fetchall())
+        return {
+            "total_tracked": sum(counts.values()),
+            "active_listings": counts.get('active', 0),
+            "sold_or_removed": counts.get('sold_or_removed', 0)
+        }
+
+    def record(self, event):
+        """Queue an event; nothing is written until commit()."""
+        self._queued.append(event)
+
+    def commit(self):
+        """Apply the queued events in one transaction. Returns how many were applied."""
+        events, self._queued = self._queued, []
+        if not events:
+            return 0
+        by_type = defaultdict(list)
+        for event in events:
+            by_type[event["type"]].append(event)
+
+        with self.conn:
+            # Links first: later events of the run already use the real VIN
+            for table in ("vehicles", "price_observations", "sightings"):
+                self.conn.executemany(f"UPDATE {table} SET vin = ? WHERE vin = ?",
+                                      [(e["vin"], e["old"]) for e in by_type["link"]])
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO vehicles ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                [self._new_row(event) for event in by_type["new"]])
+            self.conn.executemany("UPDATE vehicles SET status = ? WHERE vin = ?",
+                                  [(e["new"], e["vin"]) for e in by_type["status"]])
+            self.conn.executemany("UPDATE vehicles SET price = ? WHERE vin = ?",
+                                  [(e["new"], e["vin"]) for e in by_type["price"]])
+            # One observation per day; a second change on the same day replaces it
+            self.conn.executemany("INSERT OR REPLACE INTO price_observations (vin, date, price) VALUES (?, ?, ?)",
+                                  [(e["vin"], e["date"], e["car"]["price"]) for e in by_type["new"]] +
+                                  [(e["vin"], e["date"], e["new"]) for e in by_type["price"]])
+            self.conn.executemany("UPDATE vehicles SET miles = ? WHERE vin = ?",
+                                  [(e["new"], e["vin"]) for e in by_type["miles"]])
+
+            updates = defaultdict(list)
+            for e in by_type["update"]:
+                fields = tuple(sorted(key for key in e["fields"] if key in UPDATABLE))
+                if fields:
+                    updates[fields].append(tuple(e["fields"][key] for key in fields) + (e["vin"],))
+            for fields, rows in updates.items():
+                assignments = ", ".join(f"{key} = ?" for key in fields)
+                self.conn.executemany(f"UPDATE vehicles SET {assignments} WHERE vin = ?", rows)
+
+            seen = [(e["date"], vin) for e in by_type["seen"] for vin in e["vins"]]
+            self.conn.executemany("UPDATE vehicles SET last_seen = ? WHERE vin = ?", seen)
+            self.conn.executemany("INSERT OR IGNORE INTO sightings (date, vin) VALUES (?, ?)", seen)
+
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('pending_events', ?)",
+                              (str(self.pending + len(events)),))
+        return len(events)
+
+    def _new_row(self, event):
+        car = event["car"]
+        date = event["date"]
+        values = {**car, "status": 'active', "first_seen": date, "last_seen": date, "original_price": car['price']}
+        return tuple(values.get(column) for column in COLUMNS)
+
+    def needs_compaction(self):
+        return self.pending >= self.compact_every
+
+    def refresh_view(self):
+        """Export prospects_db.json as a materialized view of the database (loads every record)."""
+        write_json_atomic(self.view_file, build_view(self.load()), indent=2, backups=self.backups)
+
+    def compact(self):
+        """Reset the pending-event count and optimize the database."""
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('pending_events', '0')")
+        self.conn.execute("PRAGMA optimize")
+
+    def close(self):
+        self.conn.close()
+        if self.lock is not None:
+            self.lock.release()
+
+
+def migrate(data_dir, force=False):
+    """
+    Copy the JSON store (snapshot + event log, or prospects_db.json) into
+    data/prospects.db. Past sightings are not recorded in the JSON, so each
+    vehicle's first_seen and last_seen days are imported as its sightings.
+    """
+    data_dir = Path(data_dir)
+    db_path = data_dir / DB_NAME
+    lock = StoreLock(data_dir / LOCK_NAME).acquire()
+    if db_path.exists():
+        if not force:
+            lock.release()
+            print(f"Error: {db_path} already exists. Use --force to rebuild it.")
+            return False
+        for stale in (db_path, db_path.with_name(db_path.name + '-wal'), db_path.with_name(db_path.name + '-shm')):
+            if stale.exists():
+                stale.unlink()
+
+    prospects = ProspectsStore(data_dir).load()
+    store = SqliteStore(db_path, view_file=data_dir / VIEW, lock=lock)
+    with store.conn:
+        store.conn.executemany(
+            f"INSERT INTO vehicles ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+            [tuple(car.get(column) for column in COLUMNS) for car in prospects.values()])
+        store.conn.executemany(
+            "INSERT OR REPLACE INTO price_observations (vin, date, price) VALUES (?, ?, ?)",
+            [(vin, entry['date'], entry['price']) for vin, car in prospects.items() for entry in car.get('price_history', [])])
+        store.conn.executemany(
+            "INSERT OR IGNORE INTO sightings (vin, date) VALUES (?, ?)",
+            [(vin, car[key]) for vin, car in prospects.items() for key in ('first_seen', 'last_seen') if car.get(key)])
+    store.close()
+    print(f"Migrated {len(prospects)} prospects to {db_path}")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite storage for the prospects database.")
+    parser.add_argument("--migrate", action="store_true", help="Import the JSON prospects database into data/prospects.db")
+    parser.add_argument("--force", action="store_true", help="With --migrate, replace an existing prospects.db")
+    args = parser.parse_args()
+    data_dir = Path(__file__).resolve().parent.parent / 'data'
+    if args.migrate:
+        raise SystemExit(0 if migrate(data_dir, args.force) else 1)
+    parser.print_help()
@@ -0,0 +1,272 @@
+"""
+Append-only event log storage for the prospects database.
+
+Instead of rewriting all of prospects_db.json on every run, update_inventory
+appends one line per change to data/prospects_events.jsonl:
+
+    {"type": "new",    "date": ..., "vin": ..., "car": {...scraped fields...}}
+    {"type": "price",  "date": ..., "vin": ..., "old": 49498, "new": 47998}
+    {"type": "miles",  "date": ..., "vin": ..., "old": 23676, "new": 23810}
+    {"type": "status", "date": ..., "vin": ..., "old": "active", "new": "sold_or_removed"}
+    {"type": "update", "date": ..., "vin": ..., "fields": {"url": ..., "raw_text": ...}}
+    {"type": "link",   "date": ..., "vin": ..., "old": "NOVIN-..."}   (a VIN-less listing now shows its VIN)
+    {"type": "seen",   "date": ..., "vins": [...every VIN in the day's scrape...]}
+
+so a daily run appends only what changed (plus one "seen" line). The current
+state is the snapshot in data/prospects_snapshot.json with the log replayed
+on top of it from the byte offset the snapshot was taken at. Compaction
+folds the log into a new snapshot once enough events have piled up, so
+loading never replays more than COMPACT_EVERY events. The log itself is
+never rewritten, so it doubles as the full change history.
+
+prospects_db.json stays available in its original format as a materialized
+view, but it is exported (refresh_view) only on request: update_inventory
+--compact or --export-view. Between exports it lags behind the store, so
+readers go through `open_store` instead of reading the file. It is an export
+only; the store never reads it back once a snapshot exists.
+
+Without a snapshot, an existing prospects_db.json is the base the log is
+replayed onto; it is saved as the first snapshot (at log offset 0) before
+the first event is appended.
+
+The same events can instead be applied to an SQLite database (see
+prospects_sqlite.py); `open_store` picks the backend and both answer the
+same queries (lookup, active_vins, active_vehicles, stats).
+"""
+
+import copy
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+from durable_io import DEFAULT_BACKUPS, StoreLock, fsync_dir, read_json, write_json_atomic
+
+EVENT_LOG = 'prospects_events.jsonl'
+SNAPSHOT = 'prospects_snapshot.json'
+VIEW = 'prospects_db.json'
+DB_NAME = 'prospects.db'
+LOCK_NAME = '.prospects.lock'
+BACKENDS = ("auto", "json", "sqlite")
+COMPACT_EVERY = 500     # events replayed on load before the log is folded into a new snapshot
+
+
+def apply_event(prospects, event):
+    """Apply one change event to a {vin: car} dict in place."""
+    kind = event["type"]
+    date = event["date"]
+    if kind == "seen":
+        for vin in event["vins"]:
+            if vin in prospects:
+                prospects[vin]["last_seen"] = date
+        return
+
+    vin = event["vin"]
+    if kind == "new":
+        car = dict(event["car"])
+        car['first_seen'] = date
+        car['last_seen'] = date
+        car['status'] = 'active'
+        car['original_price'] = car['price']
+        car['price_history'] = [{"date": date, "price": car['price']}]
+        prospects[vin] = car
+        return
+
+    if kind == "link":
+        car = prospects.pop(event["old"])
+        car['vin'] = vin
+        prospects[vin] = car
+        return
+
+    car = prospects[vin]
+    if kind == "price":
+        car['price'] = event["new"]
+        # One history entry per day; a second change on the same day replaces it
+        if car['price_history'] and car['price_history'][-1]['date'] == date:
+            car['price_history'][-1]['price'] = event["new"]
+        else:
+            car['price_history'].append({"date": date, "price": event["new"]})
+    elif kind == "miles":
+        car['miles'] = event["new"]
+    elif kind == "status":
+        car['status'] = event["new"]
+    elif kind == "update":
+        car.update(event["fields"])
+    else:
+        raise ValueError(f"Unknown event type: {kind}")
+
+
+def build_view(prospects, last_updated=None):
+    """prospects_db.json contents for a {vin: car} dict."""
+    statuses = [car['status'] for car in prospects.values()]
+    return {
+        "_description": "Automated inventory database tracking all previously and currently scraped prospects.",
+        "last_updated": last_updated or datetime.now().isoformat(),
+        "stats": {
+            "total_tracked": len(prospects),
+            "active_listings": statuses.count('active'),
+            "sold_or_removed": statuses.count('sold_or_removed')
+        },
+        "prospects": prospects
+    }
+
+
+class ProspectsStore:
+    """Snapshot + append-only event log under a data directory."""
+
+    def __init__(self, data_dir, compact_every=COMPACT_EVERY, backups=DEFAULT_BACKUPS, lock=None):
+        self.data_dir = Path(data_dir)
+        self.log_file = self.data_dir / EVENT_LOG
+        self.snapshot_file = self.data_dir / SNAPSHOT
+        self.view_file = self.data_dir / VIEW
+        self.compact_every = compact_every
+        self.backups = backups
+        self.lock = lock
+        self.prospects = None
+        self.pending = 0        # events in the log that the snapshot does not include
+        self._offset = 0        # end of the last complete line in the log
+        self._queued = []
+        self._base = None       # bootstrap base (no snapshot yet), read once per store
+
+    def load(self):
+        """Current {vin: car} state: snapshot plus the log tail replayed on top."""
+        offset = 0
+        if self.snapshot_file.exists():
+            # An older backup is still consistent: its offset replays more of the log
+            snapshot = read_json(self.snapshot_file, self.backups)
+            prospects = snapshot['prospects']
+            offset = snapshot['log_offset']
+        else:
+            # No snapshot yet: the existing database JSON (if any) is the base and
+            # the whole log is replayed on top of it. It is read once and kept
+            # untouched (replay works on a copy) until commit() snapshots it.
+            if self._base is None:
+                self._base = self._bootstrap_base()
+                if self._base:
+                    print(f"Bootstrapping event log from {self.view_file.name} ({len(self._base)} prospects)")
+            prospects = copy.deepcopy(self._base)
+
+        self.pending = 0
+        self._offset = offset
+        if self.log_file.exists():
+            with open(self.log_file, 'rb') as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        # Torn final line of a crashed run; commit() cuts it off
+                        break
+                    apply_event(prospects, json.loads(line))
+                    self.pending += 1
+                    self._offset += len(line)
+        self.prospects = prospects
+        self._queued = []
+        return prospects
+
+    def record(self, event):
+        """Apply an event to the loaded state and queue it for the next commit()."""
+        if self.prospects is None:
+            self.load()
+        apply_event(self.prospects, event)
+        self._queued.append(event)
+
+    def commit(self):
+        """Durably append the queued events to the log. Returns how many were written."""
+        events, self._queued = self._queued, []
+        if not events:
+            return 0
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        if not self.snapshot_file.exists():
+            # Persist the bootstrap base before the first append, so a crash before
+            # compaction still leaves a snapshot the log can be replayed onto
+            write_json_atomic(self.snapshot_file, {"compacted_at": datetime.now().isoformat(), "log_offset": 0,
+                                                   "prospects": self._base or {}}, backups=self.backups)
+            self._base = None
+        created = not self.log_file.exists()
+        with open(self.log_file, 'ab') as f:
+            f.truncate(self._offset)
+            for event in events:
+                line = (json.dumps(event) + '\n').encode()
+                f.write(line)
+                self._offset += len(line)
+            f.flush()
+            os.fsync(f.fileno())
+        if created:
+            fsync_dir(self.data_dir)
+        self.pending += len(events)
+        return len(events)
+
+    def _bootstrap_base(self):
+        if self.view_file.exists():
+            return read_json(self.view_file, self.backups).get('prospects', {})
+        return {}
+
+    # Queries shared with SqliteStore, so callers do not depend on the backend
+
+    def lookup(self, vins):
+        """{vin: car} (without price_history) for the given VINs that are already tracked."""
+        if self.prospects is None:
+            self.load()
+        return {vin: _without_history(self.prospects[vin]) for vin in vins if vin in self.prospects}
+
+    def active_vins(self):
+        """{vin: last_seen} for every active listing."""
+        if self.prospects is None:
+            self.load()
+        return {vin: car['last_seen'] for vin, car in self.prospects.items() if car['status'] == 'active'}
+
+    def active_vehicles(self):
+        """Active listings (without price_history)."""
+        if self.prospects is None:
+            self.load()
+        return [_without_history(car) for car in self.prospects.values() if car['status'] == 'active']
+
+    def stats(self):
+        if self.prospects is None:
+            self.load()
+        return build_view(self.prospects)['stats']
+
+    def close(self):
+        if self.lock is not None:
+            self.lock.release()
+
+    def needs_compaction(self):
+        return self.pending >= self.compact_every or not self.snapshot_file.exists()
+
+    def refresh_view(self):
+        """Rewrite the prospects_db.json view from the current state."""
+        if self.prospects is None:
+            self.load()
+        write_json_atomic(self.view_file, build_view(self.prospects), indent=2, backups=self.backups)
+
+    def compact(self):
+        """Fold the log into a new snapshot."""
+        if self.prospects is None:
+            self.load()
+        now = datetime.now().isoformat()
+        write_json_atomic(self.snapshot_file, {"compacted_at": now, "log_offset": self._offset, "prospects": self.prospects}, backups=self.backups)
+        self.pending = 0
+
+
+def _without_history(car):
+    return {key: value for key, value in car.items() if key != 'price_history'}
+
+
+def open_store(data_dir, backend="auto", write=False):
+    """
+    The prospects store for a data directory: "json" (snapshot + event log),
+    "sqlite" (data/prospects.db), or "auto" to use SQLite once it has been
+    migrated to and the event log otherwise.
+
+    Holds the data directory's lock until close(): exclusive when `write`,
+    shared otherwise, so readers never see a half-applied update.
+    """
+    data_dir = Path(data_dir)
+    if backend == "auto":
+        backend = "sqlite" if (data_dir / DB_NAME).exists() else "json"
+    if backend not in ("json", "sqlite"):
+        raise ValueError(f"Unknown storage backend: {backend}")
+    lock = StoreLock(data_dir / LOCK_NAME, exclusive=write).acquire()
+    if backend == "sqlite":
+        from prospects_sqlite import SqliteStore
+        return SqliteStore(data_dir / DB_NAME, view_file=data_dir / VIEW, lock=lock)
+    return ProspectsStore(data_dir, lock=lock)
@@ -0,0 +1,123 @@
+"""
+Request filtering for the Playwright scrapers.
+
+The bmwusa.com search is a full SPA: images, video, fonts and a stack of
+third-party analytics load alongside the inventory JSON we actually read.
+ResourceFilter is installed as a route on each browser context and aborts
+anything that is not needed to render the vehicle cards or fetch inventory.
+
+The allow/deny lists can be overridden with a JSON file:
+
+    {
+      "block_resource_types": ["image", "media", "font"],
+      "block_domains": ["google-analytics.com", "doubleclick.net"],
+      "allow_patterns": ["inventoryservices", "graphql"]
+    }
+
+`allow_patterns` always wins, so the inventory API can never be blocked by a
+broader rule.
+"""
+
+import json
+from collections import Counter
+from urllib.parse import urlparse
+
+BLOCK_RESOURCE_TYPES = ["image", "media", "font"]
+
+# Analytics, tag managers, ad and session-replay hosts seen on bmwusa.com
+BLOCK_DOMAINS = [
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googleadservices.com",
+    "facebook.net",
+    "facebook.com",
+    "adobedtm.com",
+    "omtrdc.net",
+    "demdex.net",
+    "everesttech.net",
+    "hotjar.com",
+    "optimizely.com",
+    "tiqcdn.com",
+    "tealiumiq.com",
+    "bing.com",
+    "tiktok.com",
+    "linkedin.com",
+    "quantserve.com",
+    "criteo.com",
+]
+
+ALLOW_PATTERNS = ["inventoryservices", "graphql"]
+
+# Blocked requests are never downloaded, so their size is unknown; these typical
+# transfer sizes (bytes) are used to estimate what was saved.
+ESTIMATED_BYTES = {
+    "image": 60_000,
+    "media": 500_000,
+    "font": 40_000,
+    "script": 50_000,
+}
+DEFAULT_ESTIMATED_BYTES = 10_000
+
+
+class ResourceFilter:
+    """Context route handler that aborts non-essential requests and keeps counts."""
+
+    def __init__(self, block_resource_types=None, block_domains=None, allow_patterns=None):
+        self.block_resource_types = set(BLOCK_RESOURCE_TYPES if block_resource_types is None else block_resource_types)
+        self.block_domains = list(BLOCK_DOMAINS if block_domains is None else block_domains)
+        self.allow_patterns = list(ALLOW_PATTERNS if allow_patterns is None else allow_patterns)
+        self.blocked = Counter()
+        self.allowed = 0
+        self.bytes_downloaded = 0
+        self.bytes_saved = 0
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, 'r') as f:
+            config = json.load(f)
+        return cls(
+            block_resource_types=config.get("block_resource_types"),
+            block_domains=config.get("block_domains"),
+            allow_patterns=config.get("allow_patterns"),
+        )
+
+    def block_reason(self, url, resource_type):
+        """Why a request should be aborted ('image', 'tracker', ...), or None to let it through."""
+        if any(pattern in url for pattern in self.allow_patterns):
+            return None
+        if resource_type in self.block_resource_types:
+            return resource_type
+        host = urlparse(url).hostname or ""
+        if any(host == domain or host.endswith("." + domain) for domain in self.block_domains):
+            return "tracker"
+        return None
+
+    async def attach(self, context):
+        """Install the filter on a browser context (all of its pages)."""
+        await context.route("**/*", self.handle_route)
+        context.on("response", self.record_response)
+
+    async def handle_route(self, route):
+        request = route.request
+        reason = self.block_reason(request.url, request.resource_type)
+        if reason is None:
+            self.allowed += 1
+            await route.continue_()
+            return
+        self.blocked[reason] += 1
+        self.bytes_saved += ESTIMATED_BYTES.get(request.resource_type, DEFAULT_ESTIMATED_BYTES)
+        await route.abort("blockedbyclient")
+
+    def record_response(self, response):
+        length = response.headers.get("content-length")
+        if length and length.isdigit():
+            self.bytes_downloaded += int(length)
+
+    def summary(self):
+        total = sum(self.blocked.values())
+        by_reason = ", ".join(f"{reason} {count}" for reason, count in self.blocked.most_common())
+        return (
+            f"blocked {total} of {total + self.allowed} requests ({by_reason or 'none'}), "
+            f"~{self.bytes_saved / 1e6:.1f} MB saved (est.), {self.bytes_downloaded / 1e6:.1f} MB downloaded"
+        )
@@ -0,0 +1,111 @@
+"""
+Record/replay archive for the BMW CPO scraper.
+
+Record mode (`bmw_cpo_scraper.py --record DIR`) saves every inventory API
+response and every rendered vehicle card (text, link and outer HTML) while a
+live scrape runs. Replay mode (`--replay DIR`) feeds the archive back through
+the same extraction code offline, so parsing changes can be iterated on and
+benchmarked without a browser or network.
+
+Archive layout:
+
+    DIR/manifest.json     when it was recorded and the queries that ran
+    DIR/responses.jsonl   {"query", "key", "url", "method", "post_data", "body"} per inventory response
+    DIR/cards.jsonl       {"query", "key", "url", "text", "html"} per vehicle card
+
+"query" is the readable label (zip/radius/series); "key" identifies the query
+by all of its parameters (bmw_cpo_scraper.query_key), so two searches that
+differ only in years or price ranges replay their own data.
+    DIR/details.jsonl     {"vin", "url", "html"} per rendered detail page (enrich_details.py --record)
+"""
+
+import json
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+
+class ScrapeArchive:
+    """Appends a live scrape's responses and cards to an archive directory."""
+
+    def __init__(self, path, queries=()):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.responses = 0
+        self.cards = 0
+        with open(self.path / 'manifest.json', 'w') as f:
+            json.dump({"recorded_at": datetime.now().isoformat(), "queries": list(queries)}, f, indent=2)
+        # Truncate any previous recording in the same directory
+        self._responses_file = open(self.path / 'responses.jsonl', 'w')
+        self._cards_file = open(self.path / 'cards.jsonl', 'w')
+
+    def record_response(self, label, key, url, method, post_data, body):
+        self._responses_file.write(json.dumps({"query": label, "key": key, "url": url, "method": method, "post_data": post_data, "body": body}) + '\n')
+        self.responses += 1
+
+    def record_cards(self, label, key, cards):
+        for card in cards:
+            self._cards_file.write(json.dumps({"query": label, "key": key, **card}) + '\n')
+        self.cards += len(cards)
+
+    def close(self):
+        self._responses_file.close()
+        self._cards_file.close()
+        print(f"Recorded {self.responses} API responses and {self.cards} cards to {self.path}")
+
+
+def load_archive(path):
+    """
+    Read a recorded archive back -> (queries, responses, cards), where
+    responses and cards are grouped per query key in recording order.
+    """
+    path = Path(path)
+    with open(path / 'manifest.json', 'r') as f:
+        manifest = json.load(f)
+
+    responses = defaultdict(list)
+    cards = defaultdict(list)
+    for name, grouped in (('responses.jsonl', responses), ('cards.jsonl', cards)):
+        file = path / name
+        if not file.exists():
+            continue
+        with open(file, 'r') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    del record["query"]
+                    grouped[record.pop("key")].append(record)
+    return manifest.get("queries", []), responses, cards
+
+
+class DetailArchive:
+    """Appends rendered detail pages to DIR/details.jsonl (enrich_details.py --record)."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.pages = 0
+        # Truncate any previous detail recording; a scrape recorded in the same directory is kept
+        self._file = open(self.path / 'details.jsonl', 'w')
+
+    def record_page(self, vin, url, html):
+        self._file.write(json.dumps({"vin": vin, "url": url, "html": html}) + '\n')
+        self._file.flush()
+        self.pages += 1
+
+    def close(self):
+        self._file.close()
+        print(f"Recorded {self.pages} detail pages to {self.path}")
+
+
+def load_details(path):
+    """Recorded detail pages -> {vin: {"url", "html"}} (the last recording of each VIN wins)."""
+    pages = {}
+    file = Path(path) / 'details.jsonl'
+    if file.exists():
+        with open(file, 'r') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    pages[record.pop("vin")] = record
+    return pages
@@ -0,0 +1,167 @@
+"""
+Crash-safe JSON Lines output for the scraper.
+
+Every vehicle is appended to data/raw_scrape.jsonl as soon as it is parsed,
+instead of being held in memory until the browser closes. Lines are flushed
+immediately (a crash of the process loses nothing) and fsynced in batches
+(a power loss loses at most the last batch).
+
+Besides vehicles, the stream carries a few control records, marked with an
+"_event" key:
+
+    {"_event": "run_start", "started_at": ..., "queries": [...]}
+    {"_event": "query_done", "query": "22015/100mi/iX", "key": "{...full query...}", "vehicles": 17}
+    {"_event": "run_complete", "finished_at": ..., "vehicles": 42}
+
+A run that died midway can be resumed: completed queries (matched on their
+full parameters, not just the label) are skipped and VINs already written
+are not written again. Resuming a stream whose run already completed starts
+a new one instead. Readers skip control records and
+a torn final line, and report whether the run completed, so a partial scrape
+is never mistaken for "everything else was sold".
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+
+from listing_identity import dedup_key
+
+DEFAULT_FSYNC_EVERY = 25        # records
+DEFAULT_FSYNC_INTERVAL = 2.0    # seconds
+
+
+class ScrapeStream:
+    """Appends vehicles (deduplicated by VIN) and run events to a JSONL file."""
+
+    def __init__(self, path, resume=False, fsync_every=DEFAULT_FSYNC_EVERY, fsync_interval=DEFAULT_FSYNC_INTERVAL):
+        self.path = Path(path)
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.seen_vins = set()
+        self.completed_queries = set()
+        self.written = 0
+        reader = StreamReader(self.path) if resume and self.path.exists() else None
+        if reader is not None:
+            for vehicle in reader:
+                self.seen_vins.add(dedup_key(vehicle))
+            if reader.complete:
+                # Nothing to resume; yesterday's vehicles must not be carried into today's scrape
+                print(f"{self.path.name} holds a completed run; starting a new one.")
+                reader = None
+                self.seen_vins = set()
+        if reader is not None:
+            self.completed_queries = reader.completed_queries
+            self.written = len(self.seen_vins)
+            self._file = open(self.path, 'a')
+            if reader.torn:
+                # Terminate the torn line so the next record starts cleanly
+                self._file.write('\n')
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'w')
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _append(self, record):
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def start_run(self, labels):
+        self._append({"_event": "run_start", "started_at": datetime.now().isoformat(), "queries": list(labels)})
+
+    def write(self, vehicle):
+        """Append one vehicle unless its VIN was already written. Returns True if written."""
+        # VIN-less cards are told apart by their visible fields
+        key = dedup_key(vehicle)
+        if key in self.seen_vins:
+            return False
+        self.seen_vins.add(key)
+        self._append(vehicle)
+        self.written += 1
+        return True
+
+    def query_done(self, label, count, key=None):
+        """Mark a query finished; `key` identifies it on resume (defaults to the label)."""
+        self.completed_queries.add(key or label)
+        self._append({"_event": "query_done", "query": label, "key": key or label, "vehicles": count})
+        self.sync()
+
+    def complete(self):
+        self._append({"_event": "run_complete", "finished_at": datetime.now().isoformat(), "vehicles": self.written})
+        self.sync()
+
+    def close(self):
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+
+class StreamReader:
+    """
+    Iterates the vehicles in a scrape stream one line at a time. After
+    iteration, `complete` tells whether the run finished, `completed_queries`
+    the keys of the queries that did and `started_at` when the latest run started. Falls back to a legacy
+    raw_scrape.json list (treated as complete) when the stream does not exist.
+    """
+
+    def __init__(self, path, legacy_path=None):
+        self.path = Path(path)
+        self.legacy_path = Path(legacy_path) if legacy_path else None
+        self.complete = False
+        self.completed_queries = set()
+        self.torn = False
+        self.count = 0
+        self.started_at = None
+
+    def exists(self):
+        return self.path.exists() or (self.legacy_path is not None and self.legacy_path.exists())
+
+    def __iter__(self):
+        self.complete = False
+        self.completed_queries = set()
+        self.torn = False
+        self.count = 0
+        self.started_at = None
+        if not self.path.exists() and self.legacy_path is not None and self.legacy_path.exists():
+            with open(self.legacy_path, 'r') as f:
+                vehicles = json.load(f)
+            for vehicle in vehicles:
+                self.count += 1
+                yield vehicle
+            self.complete = True
+            return
+
+        with open(self.path, 'r') as f:
+            for line in f:
+                if not line.endswith('\n'):
+                    # Last line of a crashed run; it may be cut off mid-record
+                    self.torn = True
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    self.torn = True
+                    continue
+                event = record.get("_event")
+                if event is None:
+                    self.count += 1
+                    yield record
+                elif event == "run_start":
+                    # A resumed run appends a new run_start; completion is per the latest one
+                    self.complete = False
+                    self.started_at = record.get("started_at")
+                elif event == "query_done":
+                    self.completed_queries.add(record.get("key", record["query"]))
+                elif event == "run_complete":
+                    self.complete = True
@@ -0,0 +1,99 @@
+"""
+Merging many scrape shards into one daily scrape.
+
+When several regions are scraped at once, each scraper run writes its own
+stream (`bmw_cpo_scraper.py --output data/shards/22015.jsonl`, ...) or
+legacy raw_scrape JSON list. `merge_shards` parses the shards in a process pool
+and deduplicates vehicles by VIN across them, with a deterministic conflict
+policy:
+
+*   Shards are ordered by when they were scraped (the stream's run_start,
+    else the file's modification time), then by path.
+*   The latest observation of a VIN wins; within a shard, the later line.
+*   A VIN seen at different prices in different shards is reported as a
+    price conflict, with the price each shard saw.
+
+The merged scrape counts as complete only if every shard completed, so a
+car is never marked sold just because the shard for its region died.
+"""
+
+import glob
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from listing_identity import dedup_key, has_vin
+from scrape_stream import StreamReader
+
+SHARD_SUFFIXES = (".jsonl", ".json")
+
+
+def find_shards(inputs):
+    """Shard files for a list of files, directories and glob patterns (sorted, unique)."""
+    shards = set()
+    for entry in inputs:
+        path = Path(entry)
+        if path.is_dir():
+            shards.update(p for p in path.iterdir() if p.suffix in SHARD_SUFFIXES)
+        elif path.exists():
+            shards.add(path)
+        else:
+            shards.update(Path(p) for p in glob.glob(entry) if Path(p).suffix in SHARD_SUFFIXES)
+    # A stream supersedes the legacy JSON list written next to it
+    return sorted(p for p in shards if not (p.suffix == ".json" and p.with_suffix(".jsonl") in shards))
+
+
+def read_shard(path):
+    """Parse one shard (runs in a worker process)."""
+    path = Path(path)
+    if path.suffix == ".json":
+        with open(path, 'r') as f:
+            vehicles = json.load(f)
+        if not isinstance(vehicles, list):
+            raise ValueError(f"{path} is not a scrape shard (expected a list of vehicles)")
+        complete, started_at = True, None
+    else:
+        reader = StreamReader(path)
+        vehicles = list(reader)
+        complete, started_at = reader.complete, reader.started_at
+    return {
+        "path": str(path),
+        "vehicles": vehicles,
+        "complete": complete,
+        "count": len(vehicles),
+        "scraped_at": started_at or datetime.fromtimestamp(os.path.getmtime(path)).isoformat(),
+    }
+
+
+def merge_shards(paths, workers=None):
+    """
+    Merge shards -> (vehicles, complete, conflicts, shards), where vehicles
+    holds one record per VIN, conflicts maps each VIN seen at more than one
+    price to {shard path: price}, and shards lists each shard's
+    path / count / complete / scraped_at.
+    """
+    paths = [str(p) for p in paths]
+    if len(paths) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            shards = list(pool.map(read_shard, paths))
+    else:
+        shards = [read_shard(p) for p in paths]
+    shards.sort(key=lambda shard: (shard["scraped_at"], shard["path"]))
+
+    merged = {}
+    prices = {}
+    for shard in shards:
+        for car in shard["vehicles"]:
+            key = dedup_key(car)
+            # Re-inserting moves the VIN to the end, so output order follows the winning observation
+            merged.pop(key, None)
+            merged[key] = car
+            if has_vin(key):
+                prices.setdefault(key, {})[shard["path"]] = car.get("price")
+
+    conflicts = {vin: seen for vin, seen in prices.items() if len(set(seen.values())) > 1}
+    complete = bool(shards) and all(shard["complete"] for shard in shards)
+    summary = [{key: shard[key] for key in ("path", "count", "complete", "scraped_at")} for shard in shards]
+    return list(merged.values()), complete, conflicts, summary
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from prospects_store import open_store
+from update_inventory import update_inventory
+
+# A listing stored before VIN-less cards got their own IDs, under the shared "Unknown" key
+UNKNOWN_CAR = {
+    "vin": "Unknown",
+    "year_make_model": "2024 BMW iX",
+    "trim": "iX xDrive50",
+    "price": 49498,
+    "miles": 23671,
+    "dealer": "BMW of Sterling",
+    "url": "",
+    "raw_text": "",
+    "first_seen": "2026-04-09",
+    "last_seen": "2026-04-10",
+    "status": "active",
+    "original_price": 44598,
+    "price_history": [{"date": "2026-04-09", "price": 44598}, {"date": "2026-04-10", "price": 49498}],
+}
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_unknown_record_is_rekeyed_and_matched(tmp_path, backend):
+    with open(tmp_path / 'prospects_db.json', 'w') as f:
+        json.dump({"prospects": {"Unknown": UNKNOWN_CAR}}, f)
+    if backend == "sqlite":
+        from prospects_sqlite import migrate
+        migrate(tmp_path)
+    # The same car, a few miles later and still without a VIN
+    scraped = dict(UNKNOWN_CAR, miles=23676, raw_text="2024 BMW iX")
+    for key in ("first_seen", "last_seen", "status", "original_price", "price_history"):
+        del scraped[key]
+    with open(tmp_path / 'raw_scrape.json', 'w') as f:
+        json.dump([scraped], f)
+
+    update_inventory(backend=backend, data_dir=tmp_path)
+
+    store = open_store(tmp_path, backend)
+    prospects = store.load()
+    store.close()
+    assert "Unknown" not in prospects
+    [(listing_id, car)] = prospects.items()
+    assert listing_id.startswith("NOVIN-")
+    assert car['status'] == 'active'
+    assert car['miles'] == 23676
+    assert car['first_seen'] == "2026-04-09"
+    assert [entry['price'] for entry in car['price_history']] == [44598, 49498]
@@ -1,64 +1,119 @@
-import json
+import argparse
 from pathlib import Path
 from datetime import datetime
 
-def update_inventory():
+from change_feed import ChangeFeed, SightingsIndex
+from listing_identity import has_vin, is_synthetic, placeholder_ids, resolve_identities
+from prospects_store import BACKENDS, open_store
+from scrape_stream import StreamReader
+from shard_merge import find_shards, merge_shards
+
+def update_inventory(compact=False, backend="auto", inputs=None, workers=None, export_view=False, data_dir=None):
     project_root = Path(__file__).resolve().parent.parent.parent
-    data_dir = project_root / 'Module2_Prospecting' / 'data'
+    data_dir = Path(data_dir) if data_dir else project_root / 'Module2_Prospecting' / 'data'
     
+    stream_file = data_dir / 'raw_scrape.jsonl'
     raw_file = data_dir / 'raw_scrape.json'
-    db_file = data_dir / 'prospects_db.json'
-    
-    # Load today's raw scrape
-    if not raw_file.exists():
-        print(f"Error: {raw_file} not found. Run scraper first.")
-        return
-        
-    with open(raw_file, 'r') as f:
-        daily_scrape = json.load(f)
-        
-    print(f"Loaded {len(daily_scrape)} vehicles from daily scrape.")
     
-    # Load existing or initialize new database
-    if db_file.exists():
-        try:
-            with open(db_file, 'r') as f:
-                db_data = json.load(f)
-                prospects = db_data.get('prospects', {})
-        except json.JSONDecodeError:
-            print("Warning: existing DB is corrupt. Starting fresh.")
-            prospects = {}
+    if inputs:
+        # Many shards (one per region): parsed in parallel, deduplicated by VIN
+        shards = find_shards(inputs)
+        if not shards:
+            print(f"Error: no scrape shards found in {' '.join(inputs)}.")
+            return
+        scraped, complete, conflicts, shard_summary = merge_shards(shards, workers)
+        for shard in shard_summary:
+            state = "complete" if shard['complete'] else "INCOMPLETE"
+            print(f"[SHARD] {shard['path']}: {shard['count']} vehicles ({state}, scraped {shard['scraped_at']})")
+        for vin, seen in conflicts.items():
+            observed = ", ".join(f"${price} in {Path(path).name}" for path, price in seen.items())
+            print(f"[PRICE CONFLICT] {vin}: {observed}; keeping the latest")
+        loaded = sum(shard['count'] for shard in shard_summary)
     else:
-        prospects = {}
-        
+        # Today's raw scrape comes from the scraper's stream (or the older
+        # raw_scrape.json list if no stream exists yet)
+        daily_scrape = StreamReader(stream_file, legacy_path=raw_file)
+        if not daily_scrape.exists():
+            print(f"Error: {stream_file} not found. Run scraper first.")
+            return
+        # Held in memory on purpose: the store lookup is one batch over all of
+        # today's VINs, VIN-less listings are matched against the whole scrape,
+        # and `complete` is only known once the last line has been read. One
+        # day's scrape is a few hundred small records.
+        scraped = list(daily_scrape)
+        complete = daily_scrape.complete
+        conflicts = {}
+        loaded = daily_scrape.count
+    
+    print(f"Loaded {loaded} vehicles from daily scrape.")
+    
+    # Only the records for today's VINs are fetched from the store; this run
+    # records the changes it finds as events and commits them in one batch
+    store = open_store(data_dir, backend, write=True)
+    known = store.lookup({car['vin'] for car in scraped if has_vin(car['vin'])})
+    
+    # VIN-less cards get the stable ID of the stored listing they match (or a
+    # new one), and a VIN-less listing that now shows its VIN is linked to it.
+    # Listings stored under a placeholder VIN ("Unknown") are re-keyed to a
+    # synthetic ID first, so they are matched too and keep their history.
+    active = store.active_vehicles()
+    vinless = {car['vin']: car for car in active if is_synthetic(car['vin'])}
+    rekeyed = placeholder_ids(active, taken=vinless)
+    for car in active:
+        if car['vin'] in rekeyed:
+            vinless[rekeyed[car['vin']]] = dict(car, vin=rekeyed[car['vin']])
+    links, matched, minted = resolve_identities(scraped, vinless, known)
+    known.update(store.lookup({car['vin'] for car in scraped if is_synthetic(car['vin'])}))
+    known.update({listing_id: vinless[listing_id] for listing_id in rekeyed.values()})
     today = datetime.now().strftime("%Y-%m-%d")
+    
+    # Each change also goes to this run's JSONL feed, and the sightings index
+    # keeps listing age and last price cut per VIN
+    feed = ChangeFeed(data_dir)
+    index = SightingsIndex(data_dir).load()
+    if not index.exists():
+        index.rebuild(store.load())
+    for placeholder, listing_id in rekeyed.items():
+        store.record({"type": "link", "date": today, "vin": listing_id, "old": placeholder})
+        index.link(placeholder, listing_id, today)
+        feed.emit(listing_id, "linked", placeholder, listing_id)
+        print(f"[REKEYED] Listing stored as VIN {placeholder!r} is now {listing_id}")
+    for vin, seen in conflicts.items():
+        feed.emit(vin, "price_conflict", new=seen)
+    for vin, listing_id in links.items():
+        store.record({"type": "link", "date": today, "vin": vin, "old": listing_id})
+        index.link(listing_id, vin, today)
+        feed.emit(vin, "linked", listing_id, vin)
+        known[vin] = dict(vinless[listing_id], vin=vin)
+        print(f"[LINKED] VIN-less listing {listing_id} is {vin}")
+        
     scraped_vins = set()
     
     new_cars = 0
     price_drops = 0
     
     # Process scraped cars
-    for car in daily_scrape:
+    for car in scraped:
         vin = car['vin']
+        if vin in scraped_vins:
+            # First occurrence wins, as in the scrape stream
+            continue
         scraped_vins.add(vin)
         current_price = car['price']
         
         # New vehicle found!
-        if vin not in prospects:
-            car['first_seen'] = today
-            car['last_seen'] = today
-            car['status'] = 'active'
-            car['original_price'] = current_price
-            car['price_history'] = [{"date": today, "price": current_price}]
-            prospects[vin] = car
+        if vin not in known:
+            store.record({"type": "new", "date": today, "vin": vin, "car": car})
+            feed.emit(vin, "new", new=current_price)
             new_cars += 1
             print(f"[NEW] Added {vin}: ${current_price} ({car['dealer']})")
             
         # Existing vehicle update!
         else:
-            old_car = prospects[vin]
-            old_car['last_seen'] = today
-            old_car['status'] = 'active'
+            old_car = known[vin]
+            if old_car['status'] != 'active':
+                store.record({"type": "status", "date": today, "vin": vin, "old": old_car['status'], "new": 'active'})
+                feed.emit(vin, "relisted", old_car['status'], 'active')
             
             # Check for price changes
             if current_price != old_car['price']:
@@ -66,53 +121,77 @@ def update_inventory():
                 if diff < 0:
                     print(f"[PRICE DROP] {vin} dropped from ${old_car['price']} to ${current_price} ({-diff} drop)")
                     price_drops += 1
+                    index.record_price_cut(vin, today)
                 else:
                     print(f"[PRICE INCREASE] {vin} increased from ${old_car['price']} to ${current_price}")
+                feed.emit(vin, "price_drop" if diff < 0 else "price_increase", old_car['price'], current_price)
+                store.record({"type": "price", "date": today, "vin": vin, "old": old_car['price'], "new": current_price})
                 
-                old_car['price'] = current_price
-                
-                # Append to history if it's a new day
-                if old_car['price_history'][-1]['date'] == today:
-                    old_car['price_history'][-1]['price'] = current_price
-                else:
-                    old_car['price_history'].append({"date": today, "price": current_price})
+            if car['miles'] != old_car.get('miles'):
+                store.record({"type": "miles", "date": today, "vin": vin, "old": old_car.get('miles'), "new": car['miles']})
+                feed.emit(vin, "miles", old_car.get('miles'), car['miles'])
                 
             # Keep other attributes fresh
-            old_car['miles'] = car['miles']
-            old_car['url'] = car['url']
-            old_car['raw_text'] = car['raw_text']
+            # A legacy raw_scrape.json has no source; that is not a change
+            fresh = {"url": car['url'], "raw_text": car['raw_text'], "source": car.get('source', old_car.get('source'))}
+            changed = {key: value for key, value in fresh.items() if old_car.get(key) != value}
+            if changed:
+                store.record({"type": "update", "date": today, "vin": vin, "fields": changed})
+
+    if scraped_vins:
+        store.record({"type": "seen", "date": today, "vins": sorted(scraped_vins)})
+        index.record_sightings(today, scraped_vins)
 
     # Mark cars that disappeared as sold/removed
     removed_cars = 0
-    for vin, car_data in prospects.items():
-        if vin not in scraped_vins and car_data['status'] == 'active':
-            car_data['status'] = 'sold_or_removed'
-            # We DONT update last_seen, so we know exactly when it disappeared
-            removed_cars += 1
-            print(f"[REMOVED] {vin} is no longer listed. Last seen {car_data['last_seen']}.")
+    if complete:
+        linked_ids = set(links.values())
+        # The SQLite store applies this run's re-keying only on commit
+        active_vins = {rekeyed.get(vin, vin): last_seen for vin, last_seen in store.active_vins().items()}
+        for vin, last_seen in active_vins.items():
+            # A linked listing lives on under its real VIN
+            if vin not in scraped_vins and vin not in linked_ids:
+                # We DONT update last_seen, so we know exactly when it disappeared
+                store.record({"type": "status", "date": today, "vin": vin, "old": 'active', "new": 'sold_or_removed'})
+                feed.emit(vin, "removed", 'active', 'sold_or_removed')
+                removed_cars += 1
+                print(f"[REMOVED] {vin} is no longer listed after {index.days_listed(vin)} days. Last seen {last_seen}.")
+    else:
+        # A partial scrape (or any unfinished shard) says nothing about the cars it never reached
+        print("Warning: today's scrape did not complete. Skipping sold/removed detection.")
             
-    # Save the database
-    output_db = {
-        "_description": "Automated inventory database tracking all previously and currently scraped prospects.",
-        "last_updated": datetime.now().isoformat(),
-        "stats": {
-            "total_tracked": len(prospects),
-            "active_listings": len([c for c in prospects.values() if c['status'] == 'active']),
-            "sold_or_removed": len([c for c in prospects.values() if c['status'] == 'sold_or_removed'])
-        },
-        "prospects": prospects
-    }
-    
-    with open(db_file, 'w') as f:
-        json.dump(output_db, f, indent=2)
+    # Save the day's changes; the prospects_db.json view is only exported on request
+    written = store.commit()
+    index.save()
+    feed.complete()
+    if compact or store.needs_compaction():
+        store.compact()
+        print("Compacted the prospects store")
+    if compact or export_view:
+        store.refresh_view()
+        print(f"Exported {store.view_file.name}")
+    stats = store.stats()
+    pending = store.pending
+    store.close()
         
     print("\n--- INVENTORY UPDATE COMPLETE ---")
     print(f"Total Scraped: {len(scraped_vins)}")
     print(f"New Cars Added: {new_cars}")
     print(f"Price Changes: {price_drops}")
+    print(f"VIN-less Listings: {matched} matched, {minted} new, {len(links)} linked to a VIN")
+    if inputs:
+        print(f"Price Conflicts Across Shards: {len(conflicts)}")
     print(f"Cars Removed: {removed_cars}")
-    print(f"DB Total: {output_db['stats']['total_tracked']} ({output_db['stats']['active_listings']} active)")
-    print(f"Saved to {db_file.name}")
+    print(f"DB Total: {stats['total_tracked']} ({stats['active_listings']} active)")
+    print(f"Change feed: {feed.count} changes in {feed.path.relative_to(data_dir)}")
+    print(f"Recorded {written} change events ({type(store).__name__}, {pending} since last compaction)")
 
 if __name__ == "__main__":
-    update_inventory()
+    parser = argparse.ArgumentParser(description="Merge today's scrape into the prospects database.")
+    parser.add_argument("--compact", action="store_true", help="Compact the store now and export prospects_db.json")
+    parser.add_argument("--export-view", action="store_true", help="Export prospects_db.json from the store after this run")
+    parser.add_argument("--backend", choices=BACKENDS, default="auto", help="Storage backend (auto: SQLite once data/prospects.db exists)")
+    parser.add_argument("--inputs", nargs="+", metavar="PATH", help="Scrape shards to merge: files, directories or glob patterns (default: data/raw_scrape.jsonl)")
+    parser.add_argument("--workers", type=int, default=None, help="Processes used to parse shards (default: one per CPU)")
+    args = parser.parse_args()
+    update_inventory(compact=args.compact, backend=args.backend, inputs=args.inputs, workers=args.workers, export_view=args.export_view)